@@ -1,33 +1,82 @@
 # app/auth/auth.py
+from collections import OrderedDict
 from typing import Any
+import hashlib
 import logging
+import os
+import time
 
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.auth.supabase_client import get_supabase
+from app.services.async_db import run_blocking
 from app.services.user_service import get_user_by_id
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
+# Tokens Supabase Auth has already verified, so repeat requests with the same
+# token skip the round-trip; entries never outlive the token's own expiry
+TOKEN_CACHE_SIZE = 10_000
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+_token_cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+
+def _token_key(token: str) -> str:
+    # Keep digests rather than live bearer tokens in memory
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _cached_user_id(token: str) -> str | None:
+    key = _token_key(token)
+    entry = _token_cache.get(key)
+    if entry is None:
+        return None
+    user_id, valid_until = entry
+    if time.time() >= valid_until:
+        _token_cache.pop(key, None)
+        return None
+    _token_cache.move_to_end(key)
+    return user_id
+
+
+def _remember_token(token: str, user_id: str) -> None:
+    valid_until = time.time() + TOKEN_CACHE_TTL_SECONDS
+    try:
+        # Signature was checked by Supabase; only the expiry claim is read here
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        if exp:
+            valid_until = min(valid_until, float(exp))
+    except jwt.PyJWTError:
+        return
+    key = _token_key(token)
+    _token_cache[key] = (user_id, valid_until)
+    _token_cache.move_to_end(key)
+    while len(_token_cache) > TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict[str, Any]:
     """Get current authenticated user by verifying Supabase Auth token"""
     token = credentials.credentials
     supabase = get_supabase()
     
     try:
-        # Verify token with Supabase Auth
-        user_response = supabase.auth.get_user(token)
-        
-        if not user_response or not user_response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        user_id = str(user_response.user.id)
+        user_id = _cached_user_id(token)
+        if user_id is None:
+            # Verify token with Supabase Auth
+            user_response = await run_blocking(supabase.auth.get_user, token)
+
+            if not user_response or not user_response.user:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid authentication token",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+
+            user_id = str(user_response.user.id)
+            _remember_token(token, user_id)
         
         # Get user profile from custom users table
         user = await get_user_by_id(user_id)
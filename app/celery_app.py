@@ -1,7 +1,19 @@
+import orjson
 from celery import Celery
+from celery.signals import worker_process_init
+from kombu.serialization import register
 
 from app.config import settings, REDIS_URL
 
+# orjson encodes task payloads (chunk metadata, summaries) several times faster than json
+register(
+    "orjson",
+    orjson.dumps,
+    orjson.loads,
+    content_type="application/x-orjson",
+    content_encoding="utf-8",
+)
+
 # Use unified settings for Celery configuration
 celery = Celery(
     "worker",
@@ -12,9 +24,9 @@ celery = Celery(
 
 # Configure Celery settings for notes processing
 celery.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer="orjson",
+    accept_content=["orjson", "json"],  # json still accepted for messages queued before the switch
+    result_serializer="orjson",
     timezone="UTC",
     enable_utc=True,
     worker_max_tasks_per_child=10,  # Prevent memory leaks
@@ -24,4 +36,32 @@ celery.conf.update(
     broker_connection_retry_on_startup=True,
     task_time_limit=3600,  # 1 hour hard limit
     task_soft_time_limit=3300,  # 55 minutes soft limit
+    # Notes generation waits on LLM calls, so it gets its own queue that a
+    # thread-pool worker can serve with high concurrency; PDF indexing
+    # (embedding, CPU-bound) stays on the default queue
+    task_routes={
+        "app.tasks.notes_tasks.*": {"queue": "notes"},
+    },
 )
+
+# Periodic maintenance (requires running `celery beat`)
+celery.conf.beat_schedule = {
+    "sweep-semantic-cache": {
+        "task": "app.tasks.rag_tasks.sweep_semantic_cache",
+        "schedule": 6 * 3600,  # every 6 hours
+    },
+    "sweep-summary-cache": {
+        "task": "app.tasks.notes_tasks.sweep_summary_cache_task",
+        "schedule": 24 * 3600,  # daily
+    },
+}
+
+
+@worker_process_init.connect
+def reset_chroma_after_fork(**kwargs):
+    """Give each forked worker its own Chroma client instead of the parent's SQLite handles"""
+    from app.services.semantic_cache import get_cache_collection
+    from app.services.vectorstore import get_chroma_client
+
+    get_cache_collection.cache_clear()
+    get_chroma_client.cache_clear()
@@ -42,7 +42,10 @@ class Settings(BaseSettings):
     llm_provider: str = "gemini"  # gemini, openai, or local
     gemini_model: str = "gemini-2.5-flash"
     gemini_max_output_tokens: int = 55000
+    gemini_requests_per_minute: Optional[int] = None  # None: 10 for Flash, 2 for Pro (free tier)
     openai_model: str = "gpt-3.5-turbo"
+    use_batch_api: bool = False  # Summarize large OpenAI notes jobs through the Batch API
+    batch_api_timeout: int = 1800  # Seconds to wait for a batch before falling back
 
     # Embeddings
     embedding_model: str = "all-MiniLM-L6-v2"
@@ -59,6 +62,8 @@ class Settings(BaseSettings):
     # Text Processing (for notes)
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    notes_summary_concurrency: int = 4  # Chunk summaries in flight at once
+    summary_cache_ttl_days: int = 30  # Reuse identical chunk summaries across notes; 0 disables
 
     # JWT configuration removed - now using Supabase Auth
 
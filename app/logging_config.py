@@ -0,0 +1,31 @@
+# app/logging_config.py - Non-blocking log output for the API process
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def start_logging() -> QueueListener | None:
+    """
+    Route root logging through a queue so request threads only enqueue records.
+
+    A listener thread does the formatting and stream writes. Returns the
+    listener (stop it on shutdown), or None when logging is already configured.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -1,14 +1,48 @@
 # main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 
+from app.logging_config import start_logging
 from app.routes import admin, auth, chat, documents, flashcards, notes, query, quizzes, stats, users
+from app.services.async_db import configure_blocking_pool
+from app.services.retriever import begin_collection_scope, end_collection_scope
+
+
+class CollectionScopeMiddleware:
+    """Give each HTTP request its own cache of Chroma collection handles"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = begin_collection_scope()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_collection_scope(token)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = start_logging()
+    # Supabase and Chroma calls run on the default executor via run_blocking
+    configure_blocking_pool()
+    yield
+    if log_listener:
+        log_listener.stop()
+
 
 app = FastAPI(
     title="Unified RAG & Notes API",
     description="RAG API with JWT Authentication, Document Q&A, and AI-Powered Note Generation",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -20,6 +54,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CollectionScopeMiddleware)
+
 # Include RAG routers
 app.include_router(auth.router)
 app.include_router(users.router, prefix="/users")
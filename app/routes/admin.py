@@ -2,21 +2,30 @@
 from typing import Any
 
 from chromadb import logger
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 from app.auth.auth import get_current_user
 from app.services.document_service import get_all_documents
-from app.services.user_service import get_all_users
+from app.services.user_service import count_users, get_all_users
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 @router.get("/users", response_model=list[dict])
-async def get_all_users_endpoint(current_user: dict[str, Any] = Depends(get_current_user)):
-    """Get all users (admin endpoint)"""
+async def get_all_users_endpoint(
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: dict[str, Any] = Depends(get_current_user)
+):
+    """Get a page of users, newest first (admin endpoint); the next page's cursor is in X-Next-Cursor"""
     try:
-        users = await get_all_users()
+        users, next_cursor = await get_all_users(cursor=cursor, limit=limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return users
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
     except Exception as e:
         logger.exception(f"Error getting users: {e}")
         raise HTTPException(status_code=500, detail="Failed to get users") from None
@@ -27,7 +36,7 @@ async def get_admin_stats(current_user: dict[str, Any] = Depends(get_current_use
     """Get system statistics (admin endpoint)"""
     try:
         # You might want to add role-based access control here
-        total_users = len(await get_all_users())
+        total_users = await count_users()
         total_documents = len(await get_all_documents())
 
         return {
@@ -14,6 +14,8 @@ from app.services.document_service import (
     get_document_by_id,
     get_user_documents,
 )
+from app.services.retriever import clear_search_results
+from app.services.semantic_cache import invalidate_collection
 from app.services.vectorstore import get_collection
 from app.tasks import process_pdf
 
@@ -64,6 +66,10 @@ async def upload_multiple_pdfs(
             document_data=document_data
         )
 
+        # New content is on its way; stop serving cached misses/answers
+        invalidate_collection(f"user_{user_id}_docs")
+        clear_search_results(f"user_{user_id}_docs")
+
         # Queue for processing (Celery task)
         task = process_pdf.delay(  # type: ignore
             file_path,
@@ -160,15 +166,19 @@ async def delete_pdf(
         collection_name = f"user_{user_id}_docs"
         collection = get_collection(collection_name)
 
-        # Delete embeddings from ChromaDB
+        # Delete embeddings from ChromaDB. Every chunk carries its document_id
+        # in metadata; only documents indexed before that stored their chunk IDs
         embeddings_deleted = 0
-        if document.get('chroma_document_ids'):
-            try:
+        try:
+            if document.get('chroma_document_ids'):
                 collection.delete(ids=document['chroma_document_ids'])
                 embeddings_deleted = len(document['chroma_document_ids'])
-                logger.info(f"Deleted {embeddings_deleted} embeddings for document {document_id}")
-            except Exception as e:
-                logger.error(f"Error deleting embeddings: {e}")
+            else:
+                collection._collection.delete(where={"document_id": document_id})
+                embeddings_deleted = document.get('total_chunks') or 0
+            logger.info(f"Deleted {embeddings_deleted} embeddings for document {document_id}")
+        except Exception as e:
+            logger.error(f"Error deleting embeddings: {e}")
 
         # Delete physical file
         if os.path.exists(document['storage_path']):
@@ -181,6 +191,10 @@ async def delete_pdf(
         # Delete from database
         await delete_document(document_id, user_id)
 
+        # Cached answers and search results may quote the deleted document
+        invalidate_collection(collection_name)
+        clear_search_results(collection_name)
+
         # Import and clear collection cache to prevent stale state
         from app.services.vectorstore import reset_collection
         try:
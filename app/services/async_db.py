@@ -0,0 +1,29 @@
+# app/services/async_db.py - Run blocking Supabase SDK calls off the event loop
+import asyncio
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# Threads shared by every run_blocking call; the work is mostly waiting on
+# Supabase/Chroma, so never fewer than asyncio's usual cap of 32
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", str(max(32, (os.cpu_count() or 1) * 2))))
+
+
+def configure_blocking_pool() -> None:
+    """Install a sized default executor on the running loop (call at startup)"""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+    )
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking call (e.g. a PostgREST ``.execute``) in a worker thread.
+
+    The supabase Python client is synchronous; awaiting its calls through this
+    helper keeps the event loop free to serve other requests meanwhile.
+    """
+    return await asyncio.to_thread(fn, *args, **kwargs)
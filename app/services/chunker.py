@@ -1,14 +1,41 @@
+from collections.abc import Iterable, Iterator
+
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
-def chunk_text(text: str, chunk_size: int = 2000, overlap: int = 200) -> list[str]:
-    text_splitter = RecursiveCharacterTextSplitter(
+def _text_splitter(chunk_size: int, overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=overlap,
         length_function=len,
         separators=["\n\n", "\n", ".", " ", ""],  # Tries to split on natural boundaries
     )
-    return text_splitter.split_text(text)
+
+
+def chunk_text(text: str, chunk_size: int = 2000, overlap: int = 200) -> list[str]:
+    return _text_splitter(chunk_size, overlap).split_text(text)
+
+
+def iter_chunks(pages: Iterable[str], chunk_size: int = 2000, overlap: int = 200,
+                window_size: int = 100_000) -> Iterator[str]:
+    """
+    Chunk a stream of page texts without joining the whole document first.
+
+    Pages are joined with spaces (as for chunk_text) into a window of about
+    window_size characters. Every chunk but the last is emitted; the last one
+    may continue on the next page, so it is carried into the next window.
+    """
+    text_splitter = _text_splitter(chunk_size, overlap)
+    buffer = ""
+    for page in pages:
+        buffer = f"{buffer} {page}" if buffer else page
+        if len(buffer) < window_size:
+            continue
+        chunks = text_splitter.split_text(buffer)
+        yield from chunks[:-1]
+        buffer = chunks[-1] if chunks else ""
+    if buffer.strip():
+        yield from text_splitter.split_text(buffer)
 
 # def chunk_text(text: str, chunk_size: int = 800, overlap: int = 100):
 #     chunks = []
@@ -28,11 +28,11 @@ async def create_document(user_id: str, document_data: dict[str, Any]) -> dict[s
         print(f"Error creating document: {e}")
         raise
 
-async def update_document_status(document_id: str, status: str,
-                               chunk_ids: list[str] = None,
-                               total_chunks: int = None,
-                               error: str = None):
-    """Update document processing status"""
+def update_document_status_sync(document_id: str, status: str,
+                                chunk_ids: list[str] = None,
+                                total_chunks: int = None,
+                                error: str = None):
+    """Update document processing status (for worker code with no event loop)"""
     supabase = get_supabase()
     try:
         update_data = {
@@ -53,6 +53,13 @@ async def update_document_status(document_id: str, status: str,
         print(f"Error updating document status: {e}")
         raise
 
+async def update_document_status(document_id: str, status: str,
+                               chunk_ids: list[str] = None,
+                               total_chunks: int = None,
+                               error: str = None):
+    """Update document processing status"""
+    return update_document_status_sync(document_id, status, chunk_ids, total_chunks, error)
+
 async def get_user_documents(user_id: str) -> list[dict[str, Any]]:
     """Get all documents for a user"""
     supabase = get_supabase()
@@ -0,0 +1,126 @@
+# app/services/embedding_cache.py - Persistent chunk-embedding cache keyed by content hash
+import hashlib
+import logging
+import os
+import sqlite3
+
+import numpy as np
+
+from app.services.embeddings import MODEL_NAME
+from app.services.vectorstore import get_embedder
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3")
+
+# SQLite caps bound parameters per statement; stay well below it
+_LOOKUP_BATCH = 500
+
+# Vectors are stored as float16: half the bytes of float32, and for the
+# normalized (unit-length) vectors the embedder produces, the rounding error
+# (~1e-3 per component) does not change neighbour ranking
+STORE_DTYPE = np.float16
+
+_connection: tuple[int, sqlite3.Connection] | None = None
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database once per process (a forked worker opens its own)"""
+    global _connection
+    if _connection is None or _connection[0] != os.getpid():
+        conn = sqlite3.connect(CACHE_PATH, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " hash BLOB NOT NULL, model TEXT NOT NULL, dim INTEGER NOT NULL, vec BLOB NOT NULL,"
+            " PRIMARY KEY (hash, model))"
+        )
+        _connection = (os.getpid(), conn)
+    return _connection[1]
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def _decode_vector(dim: int, blob: bytes) -> list[float] | None:
+    """Decode a stored vector of dim values; None if the blob does not hold exactly that"""
+    if len(blob) == dim * np.dtype(STORE_DTYPE).itemsize:
+        dtype = STORE_DTYPE
+    elif len(blob) == dim * np.dtype(np.float32).itemsize:
+        # Rows written before the switch to float16 hold float32
+        dtype = np.float32
+    else:
+        return None
+    return np.frombuffer(blob, dtype=dtype).astype(np.float32).tolist()
+
+
+def get_many(hashes: list[bytes], model: str = MODEL_NAME) -> dict[bytes, list[float]]:
+    """Look up cached vectors for the given text hashes"""
+    conn = _connect()
+    found = {}
+    for start in range(0, len(hashes), _LOOKUP_BATCH):
+        batch = hashes[start:start + _LOOKUP_BATCH]
+        placeholders = ",".join("?" * len(batch))
+        rows = conn.execute(
+            f"SELECT hash, dim, vec FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+            (model, *batch),
+        )
+        for key, dim, blob in rows:
+            vector = _decode_vector(dim, blob)
+            if vector is None:
+                # Treated as a miss; the fresh vector replaces the row
+                logger.warning(f"Embedding cache row has {len(blob)} bytes for dim {dim}, ignoring it")
+                continue
+            found[key] = vector
+    return found
+
+
+def put_many(vectors: dict[bytes, list[float]], model: str = MODEL_NAME) -> None:
+    """Store vectors (as float16) keyed by text hash"""
+    conn = _connect()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, model, dim, vec) VALUES (?, ?, ?, ?)",
+            [(key, model, len(vec), np.asarray(vec, dtype=STORE_DTYPE).tobytes())
+             for key, vec in vectors.items()],
+        )
+
+
+def embed_documents_cached(texts: list[str]) -> list[list[float]]:
+    """
+    Embed texts, reusing vectors already computed for identical text.
+
+    Only cache misses are sent to the embedder. Cache failures never fail
+    the caller; they just fall back to embedding everything.
+
+    Args:
+        texts: Texts to embed
+
+    Returns:
+        One vector per text, in order
+    """
+    hashes = [text_hash(text) for text in texts]
+    try:
+        cached = get_many(list(set(hashes)))
+    except Exception as e:
+        logger.warning(f"Embedding cache lookup failed: {e}")
+        return get_embedder().embed_documents(texts)
+
+    # Embed each distinct missing text once
+    missing = {}
+    for key, text in zip(hashes, texts, strict=True):
+        if key not in cached and key not in missing:
+            missing[key] = text
+
+    if missing:
+        vectors = get_embedder().embed_documents(list(missing.values()))
+        fresh = dict(zip(missing.keys(), vectors, strict=True))
+        cached.update(fresh)
+        try:
+            put_many(fresh)
+        except Exception as e:
+            logger.warning(f"Embedding cache store failed: {e}")
+
+    logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} embedded")
+    return [cached[key] for key in hashes]
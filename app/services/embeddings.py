@@ -31,8 +31,9 @@ print(f"Loading embedding model: {MODEL_NAME}")
 embedding_model = HuggingFaceEmbeddings(
     model_name=MODEL_NAME,
     cache_folder=CACHE_DIR,
-    model_kwargs={'device': DEVICE}
-    # Remove encode_kwargs to use defaults - may resolve tokenizer issues
+    model_kwargs={'device': DEVICE},
+    # Unit-length vectors let Chroma rank by plain inner product
+    encode_kwargs={'normalize_embeddings': True}
 )
 
 async def get_embedding(text: str) -> list[float]:
@@ -1,5 +1,5 @@
 """Database service for notes functionality - unified with main backend"""
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 import logging
 
@@ -97,6 +97,13 @@ class NotesDatabase:
         response = self.client.table("summaries").insert(summary_data).execute()
         return response.data[0] if response.data else None
 
+    def create_summaries(self, summaries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert many summary records in a single request"""
+        if not summaries:
+            return []
+        response = self.client.table("summaries").insert(summaries).execute()
+        return response.data or []
+
     def get_summaries_by_note(self, note_id: str) -> List[Dict[str, Any]]:
         """Get all summaries for a note"""
         response = (
@@ -112,6 +119,36 @@ class NotesDatabase:
         """Delete all summaries for a note"""
         self.client.table("summaries").delete().eq("note_id", note_id).execute()
 
+    # Summary cache operations
+    def get_cached_summaries(self, keys: List[str], max_age_days: int = 30) -> Dict[str, Dict[str, Any]]:
+        """Look up cached summaries by key, ignoring entries older than max_age_days"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat()
+        found = {}
+        # Keep each request's IN list (and so its URL) short
+        for start in range(0, len(keys), 100):
+            response = (
+                self.client.table("summary_cache")
+                .select("key, summary_text, llm_provider, llm_model")
+                .in_("key", keys[start:start + 100])
+                .gte("created_at", cutoff)
+                .execute()
+            )
+            for row in response.data or []:
+                found[row["key"]] = row
+        return found
+
+    def put_cached_summaries(self, rows: List[Dict[str, Any]]) -> None:
+        """Store (or refresh) cached summaries in a single request"""
+        if rows:
+            now = datetime.now(timezone.utc).isoformat()
+            rows = [{**row, "created_at": now} for row in rows]
+            self.client.table("summary_cache").upsert(rows, on_conflict="key").execute()
+
+    def delete_expired_cached_summaries(self, max_age_days: int = 30) -> None:
+        """Remove cached summaries older than max_age_days"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat()
+        self.client.table("summary_cache").delete().lt("created_at", cutoff).execute()
+
 
 # Global instance
 notes_db = NotesDatabase()
@@ -1,10 +1,112 @@
 # Note: We use the Gemini REST API directly instead of the SDK
 # This provides better control over safety settings and error handling
+from collections import deque
+import orjson
 from openai import OpenAI
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+import threading
+import time
+import uuid
+import redis
 import requests
+from requests.adapters import HTTPAdapter
 
 from app.config import settings
+from app.services.text_patterns import SENTENCE_BOUNDARY_RE
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter: at most max_calls per period seconds"""
+
+    def __init__(self, max_calls: int, period: float = 60.0):
+        self.max_calls = max(1, max_calls)
+        self.period = period
+        self._calls = deque()
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call may be made within the limit"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+
+                wait = self._resume_at - now
+                if wait <= 0:
+                    if len(self._calls) < self.max_calls:
+                        self._calls.append(now)
+                        return
+                    wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for a while, e.g. after a 429"""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Sliding-window limiter shared through Redis by every worker process.
+
+    The Gemini quota is per API key, so concurrent notes tasks on different
+    workers must draw from one budget. Falls back to the in-process window
+    if Redis is unreachable.
+    """
+
+    # Trim expired calls, then either record this call (returns 0) or
+    # return the seconds until the oldest call leaves the window
+    _ACQUIRE_SCRIPT = """
+    local now, period, limit = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - period)
+    if redis.call('ZCARD', KEYS[1]) < limit then
+        redis.call('ZADD', KEYS[1], now, ARGV[4])
+        redis.call('PEXPIRE', KEYS[1], math.ceil(period * 1000))
+        return '0'
+    end
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return tostring(tonumber(oldest[2]) + period - now)
+    """
+
+    def __init__(self, max_calls: int, period: float = 60.0, key: str = "ratelimit:gemini"):
+        super().__init__(max_calls, period)
+        self.key = key
+        self._redis = redis.Redis.from_url(settings.redis_url)
+        self._acquire_script = self._redis.register_script(self._ACQUIRE_SCRIPT)
+
+    def acquire(self) -> None:
+        """Block until a call may be made within the fleet-wide limit"""
+        while True:
+            try:
+                paused_ms = self._redis.pttl(f"{self.key}:paused")
+                if paused_ms > 0:
+                    time.sleep(paused_ms / 1000)
+                    continue
+                wait = float(self._acquire_script(
+                    keys=[self.key],
+                    args=[time.time(), self.period, self.max_calls, uuid.uuid4().hex],
+                ))
+            except redis.RedisError as e:
+                logger.warning(f"Shared rate limiter unavailable, limiting locally: {e}")
+                return super().acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every worker for a while, e.g. after a 429"""
+        try:
+            pause_key = f"{self.key}:paused"
+            if self._redis.pttl(pause_key) < seconds * 1000:
+                self._redis.set(pause_key, 1, px=int(seconds * 1000))
+        except redis.RedisError as e:
+            logger.warning(f"Shared rate limiter unavailable, pausing locally: {e}")
+            super().pause(seconds)
 
 
 class LLMService:
@@ -15,6 +117,11 @@ class LLMService:
         # Gemini uses REST API directly - no SDK initialization needed
         # Safety settings are applied in the REST API calls
 
+        # One keep-alive session per process so TCP/TLS setup is paid once,
+        # not on every summary/synthesis call
+        self.http = requests.Session()
+        self.http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
         # Initialize OpenAI
         if self.provider == "openai" and settings.openai_api_key:
             self.openai_client = OpenAI(api_key=settings.openai_api_key)
@@ -68,25 +175,14 @@ class LLMService:
         
         return styles.get(note_style, styles['moderate'])
     
-    def generate_summary(
+    def _build_summary_prompt(
         self,
         text: str,
-        note_style: str = "moderate",
-        user_prompt: Optional[str] = None,
-        max_tokens: int = None
-    ) -> Dict[str, Any]:
-        """
-        Generate a summary of the given text in the specified style.
-        
-        Args:
-            text: Text to summarize
-            note_style: 'short', 'moderate', or 'descriptive'
-            user_prompt: Optional user-provided prompt instructions
-            max_tokens: Maximum tokens in response (overrides style default)
-        
-        Returns:
-            Dict with summary text, tokens used, model info
-        """
+        note_style: str,
+        user_prompt: Optional[str],
+        max_tokens: Optional[int] = None
+    ) -> Tuple[str, int]:
+        """Build the chunk summary prompt; returns (prompt, max_tokens)"""
         # Get style-specific settings
         style_config = self._get_style_instructions(note_style)
         if max_tokens is None:
@@ -115,7 +211,30 @@ You are a helpful note-taking assistant for academic content. Your job is to cre
         wrapped_text = f"ACADEMIC CONTENT:\n{text}\n\n(This is educational material from academic sources)"
         
         prompt = f"{base_prompt}\n\n{wrapped_text}\n\nEDUCATIONAL NOTES:"
+
+        return prompt, max_tokens
+
+    def generate_summary(
+        self,
+        text: str,
+        note_style: str = "moderate",
+        user_prompt: Optional[str] = None,
+        max_tokens: int = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a summary of the given text in the specified style.
+        
+        Args:
+            text: Text to summarize
+            note_style: 'short', 'moderate', or 'descriptive'
+            user_prompt: Optional user-provided prompt instructions
+            max_tokens: Maximum tokens in response (overrides style default)
         
+        Returns:
+            Dict with summary text, tokens used, model info
+        """
+        prompt, max_tokens = self._build_summary_prompt(text, note_style, user_prompt, max_tokens)
+
         if self.provider == "gemini":
             return self._generate_gemini(prompt, max_tokens)
         elif self.provider == "openai":
@@ -129,6 +248,93 @@ You are a helpful note-taking assistant for academic content. Your job is to cre
                 "provider": "local"
             }
     
+    def generate_summaries_batch(
+        self,
+        texts: List[str],
+        note_style: str = "moderate",
+        user_prompt: Optional[str] = None,
+        timeout: Optional[int] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Summarize many texts in one OpenAI Batch API job (half price, no RPM limit).
+
+        Polls with exponential backoff until the batch finishes or timeout
+        seconds pass, in which case it is cancelled.
+
+        Args:
+            texts: Texts to summarize
+            note_style: 'short', 'moderate', or 'descriptive'
+            user_prompt: Optional user-provided prompt instructions
+            timeout: Seconds to wait for the batch (default settings.batch_api_timeout)
+
+        Returns:
+            One result dict per text, or None where the batch produced no usable
+            output, so the caller can fall back to per-text calls
+        """
+        if self.provider != "openai":
+            raise ValueError(f"Batch summaries are not supported for provider '{self.provider}'")
+
+        lines = []
+        for i, text in enumerate(texts):
+            prompt, max_tokens = self._build_summary_prompt(text, note_style, user_prompt)
+            lines.append(orjson.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": settings.openai_model,
+                    "messages": [
+                        {"role": "system", "content": "You are a helpful assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "max_tokens": max_tokens,
+                    "temperature": 0.7
+                }
+            }))
+
+        input_file = self.openai_client.files.create(
+            file=("summaries.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = self.openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted summary batch {batch.id} with {len(texts)} requests")
+
+        deadline = time.monotonic() + (timeout or settings.batch_api_timeout)
+        delay = 5
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if time.monotonic() >= deadline:
+                logger.warning(f"Summary batch {batch.id} still {batch.status} at timeout, cancelling")
+                self.openai_client.batches.cancel(batch.id)
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+            batch = self.openai_client.batches.retrieve(batch.id)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        if not batch.output_file_id:
+            return results
+
+        output = self.openai_client.files.content(batch.output_file_id).content
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            body = response["body"]
+            results[int(item["custom_id"])] = {
+                "text": body["choices"][0]["message"]["content"],
+                "tokens_used": body.get("usage", {}).get("total_tokens", 0),
+                "model": settings.openai_model,
+                "provider": "openai"
+            }
+        return results
+
     def synthesize_notes(
         self,
         summaries: list[str],
@@ -486,7 +692,7 @@ Sources:
             "safetySettings": safety_settings_rest
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+        response = self.http.post(url, headers=headers, data=orjson.dumps(payload), timeout=timeout)
         
         # Debug: Log response status for troubleshooting
         if response.status_code != 200:
@@ -503,7 +709,7 @@ Sources:
                 raise Exception(f"Gemini API HTTP error {response.status_code}: {response.text}")
         
         try:
-            data = response.json()
+            data = orjson.loads(response.content)
         except Exception as json_error:
             print(f"DEBUG: Failed to parse JSON response. Status: {response.status_code}")
             print(f"DEBUG: Response text: {response.text[:1000]}")  # First 1000 chars
@@ -653,8 +859,7 @@ Sources:
     
     def _simple_summary(self, text: str, max_sentences: int = 5) -> str:
         """Simple extractive summary (fallback)."""
-        import nltk
-        sentences = nltk.sent_tokenize(text)
+        sentences = SENTENCE_BOUNDARY_RE.split(text.strip())
         # Return first few sentences as summary
         return " ".join(sentences[:max_sentences])
 
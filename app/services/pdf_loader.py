@@ -1,18 +1,51 @@
+from collections.abc import Iterator
+
 from langchain.schema import Document
 from PyPDF2 import PdfReader
 
+# Content-stream operators that show text (Tj, TJ, ' and ")
+_TEXT_OPERATORS = (b"Tj", b"TJ", b"'", b'"')
 
-def extract_text_from_pdf(file_path: str) -> list[Document]:
+
+def _may_have_text(page) -> bool:
+    """
+    Cheap byte scan of the page's content streams for text-showing operators.
+
+    Scanned pages (just an image drawn with Do) fail this check and are skipped
+    without running the text extractor. Pages that draw form XObjects are
+    always extracted, since their text lives outside the page stream.
+    """
+    try:
+        contents = page["/Contents"] if "/Contents" in page else None
+        if contents is None:
+            return False
+        streams = contents if isinstance(contents, list) else [contents]
+        for stream in streams:
+            data = stream.get_object().get_data()
+            if any(op in data for op in _TEXT_OPERATORS):
+                return True
+
+        resources = page["/Resources"] if "/Resources" in page else {}
+        xobjects = resources["/XObject"] if "/XObject" in resources else {}
+        return any(xobjects[name].get("/Subtype") == "/Form" for name in xobjects)
+    except Exception:
+        # When in doubt, let the extractor decide
+        return True
+
+
+def iter_pdf_pages(file_path: str) -> Iterator[Document]:
+    """Yield non-empty pages one at a time instead of building the full list"""
     reader = PdfReader(file_path)
-    documents = []
     for i, page in enumerate(reader.pages):
+        if not _may_have_text(page):
+            continue
         text = page.extract_text() or ""
         if text.strip():
-            documents.append(Document(
+            yield Document(
                 page_content=text,
                 metadata={"source": file_path, "page": i + 1}
-            ))
-    return documents
-
+            )
 
 
+def extract_text_from_pdf(file_path: str) -> list[Document]:
+    return list(iter_pdf_pages(file_path))
@@ -1,13 +1,24 @@
 # app/services/rag.py - RAG service for concise, accurate answers
+import asyncio
+import io
 import json
 import logging
 import os
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
 
 from dotenv import load_dotenv
 from langchain.schema import HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-from app.services.retriever import semantic_search
+from app.services.async_db import run_blocking
+from app.services.retriever import get_query_embedding, semantic_search
+from app.services.semantic_cache import (
+    is_known_miss,
+    lookup_answer,
+    remember_miss,
+    store_answer,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,66 +36,9 @@ llm = ChatGoogleGenerativeAI(
     max_output_tokens=4096  # Reasonable limit for concise answers
 )
 
-
-async def answer_question(
-    question: str,
-    n_results: int = 10,
-    max_context_chars: int = 15000,
-    collection_name: str = "pdf_chunks",
-    chat_history: list = None,
-    user_id: str = None,):
-    """
-    Generate concise, accurate answers based on retrieved documents.
-    """
-    try:
-        # 1️⃣ Retrieve relevant documents
-        docs = semantic_search(question, n_results=n_results, collection_name=collection_name)
-        if not docs:
-            return "No relevant information found."
-
-        # 2️⃣ Extract FULL content, not just snippets
-        context_parts = []
-        total_content = []
-
-        for i, doc in enumerate(docs):
-            # Get the FULL content of each document
-            full_content = doc["content"]
-            score = doc["score"]
-            source = doc["metadata"].get("source", "unknown")  # noqa: F841
-
-            # Add full content to context
-            context_parts.append(f"=== Document {i+1} (Relevance: {score:.3f}) ===\n{full_content}\n")
-            total_content.append(full_content)
-
-        # Combine all content
-        full_context = "\n\n".join(context_parts)
-        if len(full_context) > max_context_chars:
-            full_context = full_context[:max_context_chars]
-
-        # 3️⃣ Build conversation history context
-        history_text = ""
-        if chat_history and len(chat_history) > 0:
-            # Get last 3-4 messages for context
-            recent_history = chat_history[-4:]
-            history_parts = []
-
-            for msg in recent_history:
-                content = msg.get('content', '').strip()
-                if content:
-                    # Truncate very long messages
-                    if len(content) > 300:
-                        content = content[:300] + "..."
-                    history_parts.append(content)
-            if history_parts:
-                history_text = f"""Previous conversation context:
-{chr(10).join(history_parts)}
-
----
-
-"""
-
-        # 3️⃣ Prompt for concise, direct answers
-        system_prompt = """You are a helpful assistant that provides clear, concise answers based on provided documents.
+# Shared by every question; kept byte-identical across requests so Gemini's
+# implicit prefix caching can reuse it (it is too short for explicit caching)
+_SYSTEM_PROMPT = """You are a helpful assistant that provides clear, concise answers based on provided documents.
 
 Your role is to:
 1. READ all provided documents thoroughly
@@ -99,8 +53,84 @@ Requirements:
 - DO include relevant technical details, formulas, and procedures when needed
 - Use clear formatting (headings, bullet points) only when helpful
 - Be thorough but brief - focus on answering the question"""
+_SYSTEM_MESSAGE = SystemMessage(content=_SYSTEM_PROMPT)
+
+
+def _sse_token(content: str) -> str:
+    """
+    Encode a streamed token as an SSE event.
 
-        human_prompt = f"""{history_text}Question: {question}
+    Byte-for-byte the same as json.dumps({'content': content, 'done': False}),
+    but only the content string is escaped instead of serializing a dict per token.
+    """
+    return f'data: {{"content": {encode_basestring_ascii(content)}, "done": false}}\n\n'
+
+
+def _build_context(docs: list[dict], max_chars: int) -> str:
+    """
+    Format retrieved documents as prompt context of at most max_chars.
+
+    Writing stops once the budget is spent, rather than joining every
+    document and truncating the result afterwards.
+    """
+    buf = io.StringIO()
+    remaining = max_chars
+    for i, doc in enumerate(docs):
+        separator = "\n\n" if i else ""
+        header = f"{separator}=== Document {i+1} (Relevance: {doc['score']:.3f}) ===\n"
+        content = doc["content"]
+        part_len = len(header) + len(content) + 1
+        if part_len > remaining:
+            # Only a prefix of this document fits; slice before copying it
+            buf.write(header[:remaining])
+            buf.write(content[:max(0, remaining - len(header))])
+            break
+        buf.write(header)
+        buf.write(content)
+        buf.write("\n")
+        remaining -= part_len
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=256)
+def _format_history(contents: tuple[str, ...]) -> str:
+    """Format a window of chat message contents; memoized per window"""
+    history_parts = []
+    for content in contents:
+        content = content.strip()
+        if content:
+            # Truncate very long messages
+            if len(content) > 300:
+                content = content[:300] + "..."
+            history_parts.append(content)
+    if not history_parts:
+        return ""
+
+    history = "\n".join(history_parts)
+    return f"""Previous conversation context:
+{history}
+
+---
+
+"""
+
+
+def _build_history(chat_history: list | None) -> str:
+    """Format the last few chat messages as a prompt prefix"""
+    if not chat_history:
+        return ""
+
+    # Get last 3-4 messages for context; follow-ups in a session resend the
+    # same window, so the formatted text is reused
+    return _format_history(tuple(msg.get('content', '') for msg in chat_history[-4:]))
+
+
+def _build_messages(question: str, docs: list[dict], chat_history: list | None, max_context_chars: int) -> list:
+    """Assemble the system and human messages for a RAG answer"""
+    full_context = _build_context(docs, max_context_chars)
+    history_text = _build_history(chat_history)
+
+    human_prompt = f"""{history_text}Question: {question}
 
 Source Materials:
 {full_context}
@@ -113,14 +143,57 @@ IMPORTANT: Don't reference the documents directly. Integrate the information nat
 
 Answer:"""  # noqa: W291
 
-        # 4️⃣ Generate response
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_prompt)
-        ]
+    return [
+        _SYSTEM_MESSAGE,
+        HumanMessage(content=human_prompt)
+    ]
+
+
+async def answer_question(
+    question: str,
+    n_results: int = 10,
+    max_context_chars: int = 15000,
+    collection_name: str = "pdf_chunks",
+    chat_history: list = None,
+    user_id: str = None,):
+    """
+    Generate concise, accurate answers based on retrieved documents.
+    """
+    try:
+        # Skip retrieval for a question that just came back empty
+        if is_known_miss(question, collection_name):
+            return "No relevant information found."
+
+        # Embed once; the vector serves both the cache lookup and retrieval
+        query_embedding = await run_blocking(get_query_embedding, question)
+
+        # 0️⃣ Reuse a cached answer for an equivalent standalone question
+        # (follow-ups depend on chat history, so they always go to the LLM)
+        use_cache = not chat_history
+        if use_cache:
+            cached_answer = await run_blocking(lookup_answer, question, collection_name, user_id, query_embedding)
+            if cached_answer is not None:
+                return cached_answer
 
+        # 1️⃣ Retrieve relevant documents
+        docs = await run_blocking(
+            semantic_search,
+            question, n_results=n_results, collection_name=collection_name, query_embedding=query_embedding
+        )
+        if not docs:
+            remember_miss(question, collection_name)
+            return "No relevant information found."
+
+        # 2️⃣ Build the prompt from retrieved content and recent history
+        messages = _build_messages(question, docs, chat_history, max_context_chars)
+
+        # 3️⃣ Generate response
         response = await llm.ainvoke(messages)
-        return response.content.strip()
+        answer = response.content.strip()
+
+        if use_cache and answer:
+            await run_blocking(store_answer, question, answer, collection_name, user_id, query_embedding)
+        return answer
 
     except Exception as e:
         logger.error(f"Error in answer_question: {str(e)}")
@@ -140,89 +213,51 @@ async def answer_question_stream(
     Yields chunks of text as they're generated in SSE format.
     """
     try:
-        # 1️⃣ Retrieve relevant documents
-        docs = semantic_search(question, n_results=n_results, collection_name=collection_name)
-        if not docs:
+        # Skip retrieval for a question that just came back empty
+        if is_known_miss(question, collection_name):
             yield f"data: {json.dumps({'content': 'No relevant information found.', 'done': True})}\n\n"
             return
 
-        # 2️⃣ Extract content
-        context_parts = []
-        for i, doc in enumerate(docs):
-            full_content = doc["content"]
-            score = doc["score"]
-            context_parts.append(f"=== Document {i+1} (Relevance: {score:.3f}) ===\n{full_content}\n")
-
-        # Combine all content
-        full_context = "\n\n".join(context_parts)
-        if len(full_context) > max_context_chars:
-            full_context = full_context[:max_context_chars]
-
-        # 3️⃣ Build conversation history context
-        history_text = ""
-        if chat_history and len(chat_history) > 0:
-            recent_history = chat_history[-4:]
-            history_parts = []
-            for msg in recent_history:
-                content = msg.get('content', '').strip()
-                if content:
-                    if len(content) > 300:
-                        content = content[:300] + "..."
-                    history_parts.append(content)
-            if history_parts:
-                history_text = f"""Previous conversation context:
-{chr(10).join(history_parts)}
-
----
-
-"""
+        # Embed once; the vector serves both the cache lookup and retrieval
+        query_embedding = await run_blocking(get_query_embedding, question)
 
-        # 4️⃣ Prompt for concise, direct answers
-        system_prompt = """You are a helpful assistant that provides clear, concise answers based on provided documents.
+        # 0️⃣ Reuse a cached answer for an equivalent standalone question
+        use_cache = not chat_history
+        if use_cache:
+            cached_answer = await run_blocking(lookup_answer, question, collection_name, user_id, query_embedding)
+            if cached_answer is not None:
+                yield _sse_token(cached_answer)
+                yield f"data: {json.dumps({'content': '', 'done': True, 'full_response': cached_answer})}\n\n"
+                return
 
-Your role is to:
-1. READ all provided documents thoroughly
-2. ANSWER the question directly using information from the documents
-3. BE CONCISE - provide essential information without unnecessary elaboration
-4. BE ACCURATE - only use information found in the provided documents
-
-Requirements:
-- Answer directly and clearly
-- DO NOT reference documents explicitly (e.g., "Document X says...")
-- DO NOT add unnecessary background or filler text
-- DO include relevant technical details, formulas, and procedures when needed
-- Use clear formatting (headings, bullet points) only when helpful
-- Be thorough but brief - focus on answering the question"""
-
-        human_prompt = f"""{history_text}Question: {question}
-
-Source Materials:
-{full_context}
-
-Answer the question concisely using the information from the source materials above. 
-Be direct and focused - provide a clear answer without unnecessary elaboration.
-Include relevant details, formulas, and procedures only when they are essential to answering the question.
-
-IMPORTANT: Don't reference the documents directly. Integrate the information naturally into your answer.
-
-Answer:"""  # noqa: W291
+        # 1️⃣ Retrieve relevant documents
+        docs = await run_blocking(
+            semantic_search,
+            question, n_results=n_results, collection_name=collection_name, query_embedding=query_embedding
+        )
+        if not docs:
+            remember_miss(question, collection_name)
+            yield f"data: {json.dumps({'content': 'No relevant information found.', 'done': True})}\n\n"
+            return
 
-        # 5️⃣ Stream response
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_prompt)
-        ]
+        # 2️⃣ Build the prompt from retrieved content and recent history
+        messages = _build_messages(question, docs, chat_history, max_context_chars)
 
+        # 3️⃣ Stream response
         full_response = ""
         async for chunk in llm.astream(messages):
             if hasattr(chunk, 'content') and chunk.content:
                 content = chunk.content
                 full_response += content
                 # Send chunk as Server-Sent Events (SSE) format
-                yield f"data: {json.dumps({'content': content, 'done': False})}\n\n"
+                yield _sse_token(content)
+
+        full_response = full_response.strip()
+        if use_cache and full_response:
+            await run_blocking(store_answer, question, full_response, collection_name, user_id, query_embedding)
 
         # Send final done message
-        yield f"data: {json.dumps({'content': '', 'done': True, 'full_response': full_response.strip()})}\n\n"
+        yield f"data: {json.dumps({'content': '', 'done': True, 'full_response': full_response})}\n\n"
 
     except Exception as e:
         logger.error(f"Error in answer_question_stream: {str(e)}")
@@ -230,27 +265,17 @@ Answer:"""  # noqa: W291
         yield f"data: {json.dumps({'content': error_msg, 'done': True, 'error': True})}\n\n"
 
 
-# Specialized function for creating study notes
-async def create_detailed_notes(topic: str, n_results: int = 15):
-    """
-    Create well-organized study notes by retrieving relevant content.
-    """
-    try:
-        # Get even more documents
-        docs = semantic_search(topic, n_results=n_results)
-        if not docs:
-            return "No relevant information found."
+# Concurrent LLM calls used when notes are generated for several topics at once
+NOTES_BATCH_CONCURRENCY = int(os.getenv("NOTES_BATCH_CONCURRENCY", "4"))
 
-        # Compile ALL content without truncation
-        all_content = []
-        for doc in docs:
-            all_content.append(doc["content"])
 
-        # Join all content
-        combined_content = "\n\n---\n\n".join(all_content)
+def _build_notes_prompt(topic: str, docs: list[dict]) -> str:
+    """Build the study-notes prompt for a topic from its retrieved documents"""
+    # Join ALL content without truncation
+    combined_content = "\n\n---\n\n".join(doc["content"] for doc in docs)
 
-        # Concise note-making prompt
-        prompt = f"""Create well-organized study notes on: {topic}
+    # Concise note-making prompt
+    return f"""Create well-organized study notes on: {topic}
 
 Source material:
 {combined_content}
@@ -265,9 +290,63 @@ Structure:
 
 Focus on clarity and completeness, not length. Include all essential information from the source material in a clear, organized format."""
 
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
+
+# Specialized function for creating study notes
+async def create_detailed_notes(topic: str, n_results: int = 15):
+    """
+    Create well-organized study notes by retrieving relevant content.
+    """
+    try:
+        # Get even more documents
+        docs = await run_blocking(semantic_search, topic, n_results=n_results)
+        if not docs:
+            return "No relevant information found."
+
+        response = await llm.ainvoke([HumanMessage(content=_build_notes_prompt(topic, docs))])
         return response.content.strip()
 
     except Exception as e:
         logger.error(f"Error in create_detailed_notes: {str(e)}")
         return f"Error generating notes: {str(e)}"
+
+
+async def create_detailed_notes_batch(topics: list[str], n_results: int = 15) -> list[str]:
+    """
+    Create study notes for several topics at once.
+
+    Retrieval for all topics runs concurrently, then the prompts go to the LLM
+    as one batch with bounded concurrency instead of one call after another.
+
+    Args:
+        topics: Topics to create notes for
+        n_results: Number of documents to retrieve per topic
+
+    Returns:
+        Notes for each topic, in the same order as topics
+    """
+    try:
+        all_docs = await asyncio.gather(
+            *(run_blocking(semantic_search, topic, n_results=n_results) for topic in topics)
+        )
+
+        results = ["No relevant information found."] * len(topics)
+        pending = [i for i, docs in enumerate(all_docs) if docs]
+        if not pending:
+            return results
+
+        responses = await llm.abatch(
+            [[HumanMessage(content=_build_notes_prompt(topics[i], all_docs[i]))] for i in pending],
+            config={"max_concurrency": NOTES_BATCH_CONCURRENCY},
+            return_exceptions=True,
+        )
+        for i, response in zip(pending, responses, strict=True):
+            if isinstance(response, Exception):
+                logger.error(f"Error creating notes for '{topics[i][:50]}': {str(response)}")
+                results[i] = f"Error generating notes: {str(response)}"
+            else:
+                results[i] = response.content.strip()
+        return results
+
+    except Exception as e:
+        logger.error(f"Error in create_detailed_notes_batch: {str(e)}")
+        return [f"Error generating notes: {str(e)}"] * len(topics)
@@ -1,15 +1,97 @@
 # app/services/retriever.py
+import json
 import logging
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar, Token
+from functools import lru_cache
 from typing import Any  # noqa: UP035
 
-from app.services.vectorstore import get_collection
+from app.services.vectorstore import (
+    get_collection,
+    get_collection_version,
+    get_embedder,
+)
 
 logger = logging.getLogger(__name__)
 
+# Results of recent identical searches; short-lived because documents are
+# indexed by the Celery worker, whose writes this process never sees
+RESULT_CACHE_SIZE = 2048
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_RESULT_CACHE_TTL_SECONDS", "60"))
+_result_cache: OrderedDict[tuple, tuple[float, list[dict[str, Any]]]] = OrderedDict()
+
+# Collection handles opened during the current request, keyed by
+# (collection_name, collection_version)
+_request_collections: ContextVar[dict | None] = ContextVar("request_collections", default=None)
+
+
+def begin_collection_scope() -> Token:
+    """Start a request-scoped collection cache; pass the token to end_collection_scope"""
+    return _request_collections.set({})
+
+
+def end_collection_scope(token: Token) -> None:
+    """Discard the collection handles cached for the current request"""
+    _request_collections.reset(token)
+
+
+def _get_scoped_collection(collection_name: str):
+    """Get a collection, reusing the handle opened earlier in the same request"""
+    cache = _request_collections.get()
+    if cache is None:
+        return get_collection(collection_name)
+
+    key = (collection_name, get_collection_version())
+    collection = cache.get(key)
+    if collection is None:
+        collection = cache[key] = get_collection(collection_name)
+    return collection
+
+
+def _result_cache_key(query: str, n_results: int, collection_name: str,
+                      where: dict[str, Any] | None, oversample_factor: int) -> tuple:
+    where_key = json.dumps(where, sort_keys=True) if where else None
+    return (collection_name, get_collection_version(), query, n_results, where_key, oversample_factor)
+
+
+def _copy_results(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Copy results so callers cannot mutate the cached entries"""
+    return [{**result, "metadata": dict(result["metadata"])} for result in results]
+
+
+def clear_search_results(collection_name: str | None = None) -> None:
+    """Drop cached search results for a collection, or for all collections"""
+    if collection_name is None:
+        _result_cache.clear()
+        return
+    for key in [key for key in _result_cache if key[0] == collection_name]:
+        _result_cache.pop(key, None)
+
+
+@lru_cache(maxsize=4096)
+def _embed_query_cached(query: str) -> tuple[float, ...]:
+    """
+    Embed a query once per process.
+
+    Every collection shares the same local embedder, so the vector only depends
+    on the query text and never goes stale; a tuple keeps the cached value immutable.
+    """
+    return tuple(get_embedder().embed_query(query))
+
+
+def get_query_embedding(query: str) -> list[float]:
+    """Get the (memoized) embedding for a search query"""
+    return list(_embed_query_cached(query))
+
+
 def semantic_search(query: str, 
                     n_results: int = 5, 
                     collection_name: str = "pdf_chunks",
-                    where: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+                    where: dict[str, Any] | None = None,
+                    query_embedding: list[float] | None = None,
+                    oversample_factor: int = 4) -> list[dict[str, Any]]:
     """
     Perform semantic search using LangChain's Chroma wrapper
     
@@ -18,19 +100,39 @@ def semantic_search(query: str,
         n_results: Number of results to return
         collection_name: Name of the collection to search
         where: Optional filter dictionary for ChromaDB where clause (e.g., {"document_id": {"$in": [...]}})
+        query_embedding: Optional precomputed embedding of the query
+        oversample_factor: Candidate multiplier used when a where filter is given,
+            so filtering does not leave fewer than n_results matches
         
     Returns:
         List of dictionaries containing search results with content, metadata, and score
     """
+    cache_key = _result_cache_key(query, n_results, collection_name, where, oversample_factor)
+    cached = _result_cache.get(cache_key)
+    if cached is not None:
+        if time.time() - cached[0] <= RESULT_CACHE_TTL_SECONDS:
+            _result_cache.move_to_end(cache_key)
+            return _copy_results(cached[1])
+        _result_cache.pop(cache_key, None)
+
     try:
-        # Get a fresh collection instance to avoid stale cache
-        collection = get_collection(collection_name)
+        # Reuse this request's handle; resets bump the version, so it is never stale
+        collection = _get_scoped_collection(collection_name)
+
+        # Reuse the query vector across repeated questions
+        if query_embedding is None:
+            query_embedding = get_query_embedding(query)
 
-        # Perform search with scores, applying filter if provided
+        # Perform search with scores, applying filter if provided; filtered
+        # searches fetch extra candidates and keep the closest n_results
         if where:
-            results = collection.similarity_search_with_score(query, k=n_results, filter=where)
+            results = collection.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, k=n_results * max(1, oversample_factor), filter=where
+            )[:n_results]
         else:
-            results = collection.similarity_search_with_score(query, k=n_results)
+            results = collection.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, k=n_results
+            )
 
         # Format results
         formatted_results = []
@@ -42,6 +144,11 @@ def semantic_search(query: str,
             })
 
         logger.info(f"Found {len(formatted_results)} results for query in collection '{collection_name}': '{query[:50]}...'")
+
+        _result_cache[cache_key] = (time.time(), _copy_results(formatted_results))
+        _result_cache.move_to_end(cache_key)
+        while len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
         return formatted_results
 
     except Exception as e:
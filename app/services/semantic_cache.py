@@ -0,0 +1,190 @@
+# app/services/semantic_cache.py - Semantic answer cache for RAG questions
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from langchain_chroma import Chroma
+
+from app.services.embeddings import embedding_model
+from app.services.vectorstore import COLLECTION_METADATA, get_chroma_client
+
+logger = logging.getLogger(__name__)
+
+CACHE_COLLECTION_NAME = "qa_cache"
+
+# Cosine similarity a cached question must reach to be reused
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+# Entries older than this are ignored on lookup and removed by the sweep task
+TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Upper bound on cached answers; the oldest entries are evicted first
+MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+
+# Questions that recently retrieved nothing; kept briefly since documents
+# are indexed asynchronously and an upload may land at any time
+NEGATIVE_CACHE_SIZE = 512
+NEGATIVE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_NEGATIVE_TTL_SECONDS", "60"))
+
+_negative_cache: OrderedDict[tuple[str, str], float] = OrderedDict()
+
+
+@lru_cache(maxsize=1)
+def get_cache_collection():
+    """Get the Chroma collection holding (question, answer) pairs"""
+    return Chroma(
+        client=get_chroma_client(),
+        collection_name=CACHE_COLLECTION_NAME,
+        embedding_function=embedding_model,
+        # Inner product over normalized vectors; distance is 1 - cosine similarity
+        collection_metadata=COLLECTION_METADATA,
+    )
+
+
+def _scope_filter(collection_name: str, user_id: str | None) -> dict[str, Any]:
+    """Build the where clause that keeps tenants from hitting each other's answers"""
+    if user_id:
+        return {"$and": [
+            {"collection_name": collection_name},
+            {"user_id": str(user_id)},
+        ]}
+    return {"collection_name": collection_name}
+
+
+def lookup_answer(question: str, collection_name: str, user_id: str | None = None,
+                  query_embedding: list[float] | None = None) -> str | None:
+    """
+    Return a cached answer for a semantically equivalent question, if any.
+
+    Args:
+        question: The incoming question
+        collection_name: Document collection the answer was generated from
+        user_id: Owner of the collection
+        query_embedding: Optional precomputed embedding of the question
+
+    Returns:
+        The cached answer, or None on a miss
+    """
+    try:
+        collection = get_cache_collection()
+        where = _scope_filter(collection_name, user_id)
+        if query_embedding is not None:
+            # By-vector search returns a distance (1 - similarity) rather than similarity
+            results = [
+                (doc, 1.0 - distance)
+                for doc, distance in collection.similarity_search_by_vector_with_relevance_scores(
+                    query_embedding, k=1, filter=where
+                )
+            ]
+        else:
+            results = collection.similarity_search_with_relevance_scores(question, k=1, filter=where)
+        if not results:
+            return None
+
+        doc, similarity = results[0]
+        if similarity < SIMILARITY_THRESHOLD:
+            return None
+        if time.time() - doc.metadata.get("ts", 0) > TTL_SECONDS:
+            return None
+
+        logger.info(f"Semantic cache hit ({similarity:.3f}) in '{collection_name}': '{question[:50]}...'")
+        return doc.metadata.get("answer")
+    except Exception as e:
+        logger.warning(f"Semantic cache lookup failed: {e}")
+        return None
+
+
+def store_answer(question: str, answer: str, collection_name: str, user_id: str | None = None,
+                 query_embedding: list[float] | None = None) -> None:
+    """Cache a generated answer keyed by the question's embedding"""
+    try:
+        metadata = {
+            "answer": answer,
+            "collection_name": collection_name,
+            "ts": time.time(),
+        }
+        if user_id:
+            metadata["user_id"] = str(user_id)
+
+        collection = get_cache_collection()
+        if query_embedding is not None:
+            collection._collection.add(
+                ids=[uuid.uuid4().hex],
+                embeddings=[query_embedding],
+                documents=[question],
+                metadatas=[metadata],
+            )
+        else:
+            collection.add_texts(
+                texts=[question],
+                metadatas=[metadata],
+                ids=[uuid.uuid4().hex],
+            )
+    except Exception as e:
+        logger.warning(f"Semantic cache store failed: {e}")
+
+
+def _negative_key(question: str, collection_name: str) -> tuple[str, str]:
+    return (collection_name, question.strip().lower())
+
+
+def is_known_miss(question: str, collection_name: str) -> bool:
+    """Check whether this question recently retrieved no documents"""
+    key = _negative_key(question, collection_name)
+    ts = _negative_cache.get(key)
+    if ts is None:
+        return False
+    if time.time() - ts > NEGATIVE_TTL_SECONDS:
+        _negative_cache.pop(key, None)
+        return False
+    _negative_cache.move_to_end(key)
+    return True
+
+
+def remember_miss(question: str, collection_name: str) -> None:
+    """Record that a question retrieved no documents"""
+    key = _negative_key(question, collection_name)
+    _negative_cache[key] = time.time()
+    _negative_cache.move_to_end(key)
+    while len(_negative_cache) > NEGATIVE_CACHE_SIZE:
+        _negative_cache.popitem(last=False)
+
+
+def invalidate_collection(collection_name: str) -> None:
+    """Drop cached answers and recorded misses for a collection whose documents changed"""
+    for key in [key for key in _negative_cache if key[0] == collection_name]:
+        _negative_cache.pop(key, None)
+    try:
+        get_cache_collection()._collection.delete(where={"collection_name": collection_name})
+        logger.info(f"Invalidated semantic cache for '{collection_name}'")
+    except Exception as e:
+        logger.warning(f"Semantic cache invalidation failed for '{collection_name}': {e}")
+
+
+def sweep_cache(ttl_seconds: int = TTL_SECONDS, max_entries: int = MAX_ENTRIES) -> int:
+    """
+    Remove expired entries, then evict the oldest ones above max_entries.
+
+    Returns:
+        Number of entries removed
+    """
+    collection = get_cache_collection()._collection
+    results = collection.get(include=["metadatas"])
+    entries = sorted(
+        zip(results["ids"], (m.get("ts", 0) for m in results["metadatas"]), strict=True),
+        key=lambda entry: entry[1],
+    )
+
+    cutoff = time.time() - ttl_seconds
+    expired = [entry_id for entry_id, ts in entries if ts < cutoff]
+    remaining = len(entries) - len(expired)
+    overflow = max(0, remaining - max_entries)
+    evicted = [entry_id for entry_id, ts in entries if ts >= cutoff][:overflow]
+
+    stale_ids = expired + evicted
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+    logger.info(f"Semantic cache sweep removed {len(stale_ids)} entries ({len(expired)} expired)")
+    return len(stale_ids)
@@ -1,34 +1,39 @@
 # app/services/storage_service.py
+import logging
 
 from app.auth.supabase_client import get_supabase
+from app.services.async_db import run_blocking
+
+logger = logging.getLogger(__name__)
 
 
 async def upload_file_to_storage(file_content: bytes, file_path: str, bucket: str = 'documents') -> str | None:
     """Upload file to Supabase Storage"""
     supabase = get_supabase()
     try:
-        result = supabase.storage.from_(bucket).upload(file_path, file_content)
+        result = await run_blocking(supabase.storage.from_(bucket).upload, file_path, file_content)
         return file_path if result else None
-    except Exception as e:
-        print(f"Error uploading file: {e}")
+    except Exception:
+        logger.exception("Error uploading file")
         return None
 
 async def delete_file_from_storage(file_path: str, bucket: str = 'documents') -> bool:
     """Delete file from Supabase Storage"""
     supabase = get_supabase()
     try:
-        result = supabase.storage.from_(bucket).remove([file_path])
+        result = await run_blocking(supabase.storage.from_(bucket).remove, [file_path])
         return len(result) > 0
-    except Exception as e:
-        print(f"Error deleting file: {e}")
+    except Exception:
+        logger.exception("Error deleting file")
         return False
 
 async def get_file_url(file_path: str, bucket: str = 'documents') -> str | None:
     """Get public URL for a file"""
     supabase = get_supabase()
     try:
+        # URL is built locally, no network round-trip to offload
         result = supabase.storage.from_(bucket).get_public_url(file_path)
         return result
-    except Exception as e:
-        print(f"Error getting file URL: {e}")
+    except Exception:
+        logger.exception("Error getting file URL")
         return None
@@ -0,0 +1,7 @@
+# app/services/text_patterns.py - Shared, dependency-free text patterns
+import re
+
+# Sentence boundary: terminal punctuation, whitespace, then a capital letter.
+# A compiled regex instead of NLTK's Punkt model, which had to be downloaded
+# at import time and classifies every candidate boundary in Python
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
@@ -1,7 +1,47 @@
 # app/services/user_service.py
+import base64
+import json
+import logging
 from typing import Any
 
 from app.auth.supabase_client import get_supabase
+from app.services.async_db import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Profile columns the API actually reads; avoids shipping whole rows from PostgREST
+USER_COLUMNS = "id, auth_user_id, email, username, first_name, last_name, profile_image_url, created_at, last_sign_in_at"
+
+
+def _user_id_filter(user_id: str) -> str:
+    """PostgREST filter matching a user by either id or auth_user_id"""
+    return f"id.eq.{user_id},auth_user_id.eq.{user_id}"
+
+
+def _encode_user_cursor(row: dict[str, Any]) -> str:
+    """Opaque page cursor for the (created_at, id) keyset; safe to pass back in a URL"""
+    raw = json.dumps([row['created_at'], str(row['id'])]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_user_cursor(cursor: str) -> tuple[str, str]:
+    """Inverse of _encode_user_cursor; raises ValueError for a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, user_id = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(created_at, str) or not isinstance(user_id, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, user_id
+
+
+def _pick_user_row(rows: list[dict[str, Any]], user_id: str) -> dict[str, Any]:
+    """Pick the row whose primary key matches user_id, else the first match"""
+    for row in rows:
+        if str(row.get('id')) == str(user_id):
+            return row
+    return rows[0]
 
 
 async def sync_user_profile(user_id: str, email: str, user_data: dict[str, Any] = None) -> dict[str, Any]:
@@ -21,7 +61,7 @@ async def sync_user_profile(user_id: str, email: str, user_data: dict[str, Any]
     
     try:
         # Check if user profile exists by auth_user_id
-        existing = supabase.table('users').select('*').eq('auth_user_id', str(user_id)).execute()
+        existing = await run_blocking(supabase.table('users').select('id').eq('auth_user_id', str(user_id)).limit(1).execute)
         
         if existing.data:
             # Update existing profile
@@ -33,7 +73,7 @@ async def sync_user_profile(user_id: str, email: str, user_data: dict[str, Any]
                 'profile_image_url': user_data.get('profile_image_url') if user_data else None,
                 'updated_at': 'now()'
             }
-            result = supabase.table('users').update(profile_data).eq('auth_user_id', str(user_id)).execute()
+            result = await run_blocking(supabase.table('users').update(profile_data).eq('auth_user_id', str(user_id)).execute)
             return result.data[0] if result.data else None
         else:
             # Create new profile (for new Supabase Auth users)
@@ -49,10 +89,42 @@ async def sync_user_profile(user_id: str, email: str, user_data: dict[str, Any]
                 'created_at': 'now()',
                 'updated_at': 'now()'
             }
-            result = supabase.table('users').insert(profile_data).execute()
+            result = await run_blocking(supabase.table('users').insert(profile_data).execute)
             return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error syncing user profile: {e}")
+    except Exception:
+        logger.exception("Error syncing user profile")
+        raise
+
+
+async def upsert_new_user_profile(user_id: str, email: str, user_data: dict[str, Any] = None) -> dict[str, Any]:
+    """
+    Create the profile for a freshly signed-up Supabase Auth user in one request.
+    New users always use auth.users.id as both id and auth_user_id, so an upsert
+    on id covers both a missing row and one the signup trigger already inserted.
+    """
+    from app.auth.supabase_client import get_service_client
+
+    try:
+        supabase = get_service_client()
+    except ValueError:
+        supabase = get_supabase()
+
+    try:
+        profile_data = {
+            'id': str(user_id),
+            'auth_user_id': str(user_id),
+            'email': email,
+            'username': user_data.get('username') if user_data else None,
+            'first_name': user_data.get('first_name') if user_data else None,
+            'last_name': user_data.get('last_name') if user_data else None,
+            'profile_image_url': user_data.get('profile_image_url') if user_data else None,
+            'created_at': 'now()',
+            'updated_at': 'now()'
+        }
+        result = await run_blocking(supabase.table('users').upsert(profile_data, on_conflict='id').execute)
+        return result.data[0] if result.data else None
+    except Exception:
+        logger.exception("Error creating user profile")
         raise
 
 
@@ -73,7 +145,7 @@ async def sign_up_user(email: str, password: str, user_data: dict[str, Any] = No
                 metadata['profile_image_url'] = user_data['profile_image_url']
 
         # Sign up with Supabase Auth
-        auth_response = supabase.auth.sign_up({
+        auth_response = await run_blocking(supabase.auth.sign_up, {
             "email": email,
             "password": password,
             "options": {
@@ -84,11 +156,10 @@ async def sign_up_user(email: str, password: str, user_data: dict[str, Any] = No
         if not auth_response.user:
             raise ValueError("Failed to create user account")
 
-        # Create/update profile in custom users table
-        await sync_user_profile(auth_response.user.id, email, user_data)
-
-        # Get user profile from custom users table
-        user_profile = await get_user_by_id(auth_response.user.id)
+        # Create profile in custom users table; the returned row is the profile
+        user_profile = await upsert_new_user_profile(auth_response.user.id, email, user_data)
+        if user_profile is None:
+            user_profile = await get_user_by_id(auth_response.user.id)
 
         # Check if email confirmation is required (session will be None)
         if not auth_response.session:
@@ -128,7 +199,7 @@ async def sign_up_user(email: str, password: str, user_data: dict[str, Any] = No
             raise ValueError("User with this email already exists")
         if "auth" in error_message.lower() or "email" in error_message.lower():
             raise ValueError(f"Authentication error: {error_message}")
-        print(f"Error signing up user: {e}")
+        logger.warning("Error signing up user: %s", e)
         raise
 
 async def sign_in_user(email: str, password: str) -> dict[str, Any]:
@@ -138,7 +209,7 @@ async def sign_in_user(email: str, password: str) -> dict[str, Any]:
     supabase = get_supabase()
     try:
         # Sign in with Supabase Auth
-        auth_response = supabase.auth.sign_in_with_password({
+        auth_response = await run_blocking(supabase.auth.sign_in_with_password, {
             "email": email,
             "password": password
         })
@@ -146,7 +217,9 @@ async def sign_in_user(email: str, password: str) -> dict[str, Any]:
         if not auth_response.user or not auth_response.session:
             raise ValueError("Invalid email or password")
 
-        # Update last sign in time in custom users table
+        # Update last sign in time in custom users table; the update returns
+        # the profile row, so no separate fetch is needed when it matched
+        user_profile = None
         try:
             # Use service client to bypass RLS
             try:
@@ -154,31 +227,27 @@ async def sign_in_user(email: str, password: str) -> dict[str, Any]:
             except ValueError:
                 service_supabase = supabase
             
-            # Try to update by auth_user_id first (for existing migrated users)
-            result = service_supabase.table('users').update({
+            # Match by auth_user_id (migrated users) or id (new users) in one request
+            result = await run_blocking(service_supabase.table('users').update({
                 'last_sign_in_at': 'now()',
                 'updated_at': 'now()'
-            }).eq('auth_user_id', str(auth_response.user.id)).execute()
-            
-            # If no rows updated, try by id (for new users)
-            if not result.data:
-                service_supabase.table('users').update({
-                    'last_sign_in_at': 'now()',
-                    'updated_at': 'now()'
-                }).eq('id', str(auth_response.user.id)).execute()
+            }).or_(_user_id_filter(auth_response.user.id)).execute)
+            if result.data:
+                user_profile = _pick_user_row(result.data, auth_response.user.id)
         except Exception as update_error:
             # If user profile doesn't exist yet, create it
-            print(f"Warning: Could not update last_sign_in_at: {update_error}")
+            logger.warning("Could not update last_sign_in_at: %s", update_error)
             # Try to sync user profile
             user_metadata = auth_response.user.user_metadata or {}
-            await sync_user_profile(
+            user_profile = await sync_user_profile(
                 auth_response.user.id,
                 auth_response.user.email,
                 user_metadata
             )
 
-        # Get user profile from custom users table
-        user_profile = await get_user_by_id(auth_response.user.id)
+        # Get user profile from custom users table if the update didn't return it
+        if user_profile is None:
+            user_profile = await get_user_by_id(auth_response.user.id)
 
         return {
             "user": {
@@ -198,7 +267,7 @@ async def sign_in_user(email: str, password: str) -> dict[str, Any]:
         error_message = str(e)
         if "invalid" in error_message.lower() or "password" in error_message.lower() or "credentials" in error_message.lower():
             raise ValueError("Invalid email or password")
-        print(f"Error signing in user: {e}")
+        logger.warning("Error signing in user: %s", e)
         raise
 
 async def update_user(user_id: str, user_data: dict[str, Any]) -> dict[str, Any]:
@@ -222,10 +291,10 @@ async def update_user(user_id: str, user_data: dict[str, Any]) -> dict[str, Any]
         # Remove None values
         update_data = {k: v for k, v in update_data.items() if v is not None}
 
-        updated_user = supabase.table('users').update(update_data).eq('id', user_id).execute()
+        updated_user = await run_blocking(supabase.table('users').update(update_data).eq('id', user_id).execute)
         return updated_user.data[0] if updated_user.data else None
-    except Exception as e:
-        print(f"Error updating user: {e}")
+    except Exception:
+        logger.exception("Error updating user")
         raise
 
 async def get_user_by_email(email: str) -> dict[str, Any] | None:
@@ -238,10 +307,10 @@ async def get_user_by_email(email: str) -> dict[str, Any] | None:
         supabase = get_supabase()
     
     try:
-        result = supabase.table('users').select('*').eq('email', email).execute()
+        result = await run_blocking(supabase.table('users').select(USER_COLUMNS).eq('email', email).limit(1).execute)
         return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user: {e}")
+    except Exception:
+        logger.exception("Error getting user")
         return None
 
 async def get_user_by_id(user_id: str) -> dict[str, Any] | None:
@@ -258,21 +327,33 @@ async def get_user_by_id(user_id: str) -> dict[str, Any] | None:
         supabase = get_supabase()
     
     try:
-        # First try to find by id (for new users created after migration)
-        result = supabase.table('users').select('*').eq('id', str(user_id)).execute()
-        if result.data:
-            return result.data[0]
-        
-        # If not found, try auth_user_id (for migrated users or alternative lookup)
-        result = supabase.table('users').select('*').eq('auth_user_id', str(user_id)).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
+        # Match id (new users) or auth_user_id (migrated users) in a single request
+        result = await run_blocking(supabase.table('users').select(USER_COLUMNS).or_(_user_id_filter(user_id)).execute)
+        if not result.data:
+            return None
+
+        return _pick_user_row(result.data, user_id)
+    except Exception:
+        logger.exception("Error getting user by ID")
         return None
 
-async def get_all_users() -> list[dict[str, Any]]:
-    """Get all users (admin only)"""
+async def get_all_users(cursor: str | None = None, limit: int = 100) -> tuple[list[dict[str, Any]], str | None]:
+    """
+    Get one page of users, newest first (admin only).
+
+    Args:
+        cursor: Opaque cursor returned with the previous page
+        limit: Maximum number of users to return
+
+    Returns:
+        (users, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        ValueError: If cursor is malformed
+    """
     from app.auth.supabase_client import get_service_client
+
+    after = _decode_user_cursor(cursor) if cursor else None
     
     try:
         supabase = get_service_client()
@@ -280,11 +361,43 @@ async def get_all_users() -> list[dict[str, Any]]:
         supabase = get_supabase()
     
     try:
-        result = supabase.table('users').select('id, email, username, first_name, last_name, profile_image_url, created_at, last_sign_in_at').order('created_at', desc=True).execute()
-        return result.data
-    except Exception as e:
-        print(f"Error getting all users: {e}")
-        return []
+        # Keyset pagination on (created_at, id): id breaks ties between users
+        # created in the same instant, so none are skipped at a page boundary
+        query = (
+            supabase.table('users')
+            .select(USER_COLUMNS)
+            .order('created_at', desc=True)
+            .order('id', desc=True)
+        )
+        if after:
+            created_at, user_id = after
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{user_id}")'
+            )
+        result = await run_blocking(query.limit(limit).execute)
+        users = result.data or []
+        next_cursor = _encode_user_cursor(users[-1]) if len(users) == limit else None
+        return users, next_cursor
+    except Exception:
+        logger.exception("Error getting all users")
+        return [], None
+
+async def count_users() -> int:
+    """Count users without fetching their rows (admin only)"""
+    from app.auth.supabase_client import get_service_client
+    
+    try:
+        supabase = get_service_client()
+    except ValueError:
+        supabase = get_supabase()
+    
+    try:
+        result = await run_blocking(supabase.table('users').select('id', count='exact').limit(1).execute)
+        return result.count or 0
+    except Exception:
+        logger.exception("Error counting users")
+        return 0
 
 async def delete_user(user_id: str) -> bool:
     """Delete a user"""
@@ -296,8 +409,8 @@ async def delete_user(user_id: str) -> bool:
         supabase = get_supabase()
     
     try:
-        result = supabase.table('users').delete().eq('id', user_id).execute()
+        result = await run_blocking(supabase.table('users').delete().eq('id', user_id).execute)
         return len(result.data) > 0
-    except Exception as e:
-        print(f"Error deleting user: {e}")
+    except Exception:
+        logger.exception("Error deleting user")
         return False
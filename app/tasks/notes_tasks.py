@@ -1,17 +1,23 @@
 """Notes processing tasks for unified backend"""
 from celery import Task
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+import logging
 import os
-import time
+import re
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
 
 from app.celery_app import celery
 from app.services.notes_db import notes_db as db
-from app.services.notes_llm import llm_service
-from app.services.vectorstore import get_collection
+from app.services.notes_llm import RateLimiter, RedisRateLimiter, llm_service
 from app.config import settings
 from app.utils.file_utils import save_note_as_markdown, get_note_filename
 
+logger = logging.getLogger(__name__)
+
 
 class CallbackTask(Task):
     """Base task with error handling"""
@@ -26,6 +32,194 @@ class CallbackTask(Task):
             )
 
 
+# Notes with more chunks than this use the Batch API when enabled
+BATCH_API_THRESHOLD = 5
+
+# Chunks fetched from Chroma per request when gathering a note's sources
+CHUNK_PAGE_SIZE = 1000
+
+# Ways Gemini reports how long to back off, e.g. "Please retry in 33.19s."
+_RETRY_DELAY_RES = [
+    re.compile(r'retry\s+in\s+(\d+(?:\.\d+)?)\s*s\.?', re.IGNORECASE),
+    re.compile(r'retry\s+in\s+(\d+(?:\.\d+)?)', re.IGNORECASE),
+    re.compile(r'(\d+(?:\.\d+)?)\s*seconds', re.IGNORECASE),
+]
+# Sentence boundaries for the extractive fallback summary
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _first_sentences(text: str, n: int = 3, min_len: int = 20) -> List[str]:
+    """First n sentences longer than min_len, scanning only as far as needed"""
+    sentences = []
+    start = 0
+    for boundary in _SENTENCE_SPLIT_RE.finditer(text):
+        sentence = text[start:boundary.start()].strip()
+        start = boundary.end()
+        if len(sentence) > min_len:
+            sentences.append(sentence)
+            if len(sentences) == n:
+                return sentences
+    tail = text[start:].strip()
+    if len(tail) > min_len:
+        sentences.append(tail)
+    return sentences
+
+
+@lru_cache(maxsize=1)
+def _is_flash_model() -> bool:
+    """Settings are fixed for the life of the worker, so check the model name once"""
+    return "flash" in settings.gemini_model.lower()
+
+
+def _gemini_requests_per_minute() -> int:
+    """Gemini request budget; free tier allows 10 requests/minute for Flash, 2 for Pro"""
+    if settings.gemini_requests_per_minute:
+        return settings.gemini_requests_per_minute
+    return 10 if _is_flash_model() else 2
+
+
+def _iter_document_chunks(collection, document_ids: List[str], page_size: int = CHUNK_PAGE_SIZE):
+    """
+    Yield the stored chunks of the given documents, one Chroma page at a time.
+
+    One $in query covers every document; paging bounds the size of each
+    response so a large document set is never materialized by Chroma at once.
+    """
+    where = {"document_id": {"$in": list(document_ids)}}
+    offset = 0
+    while True:
+        page = collection._collection.get(
+            where=where,
+            include=["documents", "metadatas"],
+            limit=page_size,
+            offset=offset
+        )
+        for i, (chroma_id, doc_text, metadata) in enumerate(
+            zip(page["ids"], page["documents"], page["metadatas"], strict=True), offset
+        ):
+            metadata = metadata or {}
+            yield {
+                "text": doc_text,
+                "document_id": metadata.get("document_id"),
+                "chunk_index": metadata.get("chunk_index", i),
+                "chroma_id": chroma_id
+            }
+        if len(page["ids"]) < page_size:
+            return
+        offset += page_size
+
+
+def _summary_cache_key(text: str, note_style: str, user_prompt: Optional[str]) -> str:
+    """Cache key covering everything that shapes a chunk summary"""
+    model = settings.gemini_model if llm_service.provider == "gemini" else settings.openai_model
+    return hashlib.sha256(
+        f"{note_style}|{user_prompt or ''}|{llm_service.provider}:{model}|{text}".encode("utf-8")
+    ).hexdigest()
+
+
+def _summary_record(chunk: Dict[str, Any], note_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Summaries table row for an LLM result"""
+    return {
+        'note_id': note_id,
+        'document_id': chunk["document_id"],
+        'chroma_chunk_id': chunk["chroma_id"],
+        'chunk_index': chunk["chunk_index"],
+        'summary_text': result['text'],
+        'llm_provider': result.get('provider', 'unknown'),
+        'llm_model': result.get('model', 'unknown'),
+        'tokens_used': result.get('tokens_used', 0)
+    }
+
+
+def _summarize_chunk(
+    chunk: Dict[str, Any],
+    index: int,
+    note_id: str,
+    note_style: str,
+    user_prompt: Optional[str],
+    limiter: Optional[RateLimiter]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Summarize one chunk, waiting on the shared rate limiter first.
+
+    Returns:
+        (summary record, summary text), or (None, None) if the chunk failed
+    """
+    try:
+        if limiter:
+            limiter.acquire()
+
+        # Generate summary for chunk with specified style
+        result = llm_service.generate_summary(
+            chunk["text"],
+            note_style=note_style,
+            user_prompt=user_prompt
+        )
+
+        # Validate that result contains required fields
+        if not result or not result.get('text'):
+            raise ValueError(f"LLM service returned empty result for chunk {index}")
+
+        return _summary_record(chunk, note_id, result), result['text']
+
+    except Exception as e:
+        error_text = str(e)
+        error_str = error_text.lower()
+        logger.warning("Error summarizing chunk %s: %s", index, error_text)
+
+        # Fallback for safety blocks: extract key sentences from the chunk
+        if "SAFETY" in error_text or "blocked" in error_str:
+            try:
+                key_sentences = _first_sentences(chunk["text"])
+                if key_sentences:
+                    # Sentences keep their own terminal punctuation
+                    fallback_summary = " ".join(key_sentences)
+                    logger.info("Using fallback summary for chunk %s due to safety block", index)
+
+                    summary_data = {
+                        'note_id': note_id,
+                        'document_id': chunk["document_id"],
+                        'chroma_chunk_id': chunk["chroma_id"],
+                        'chunk_index': chunk["chunk_index"],
+                        'summary_text': f"[Fallback] {fallback_summary}",
+                        'llm_provider': 'fallback',
+                        'llm_model': 'extractive',
+                        'tokens_used': 0
+                    }
+                    return summary_data, fallback_summary
+            except Exception as fallback_error:
+                logger.warning("Fallback extraction also failed: %s", fallback_error)
+
+        # Handle rate limit errors: hold back every worker, not just this one
+        if limiter and ("429" in error_str or "quota" in error_str or "rate limit" in error_str):
+            delay = 60 if _is_flash_model() else 90
+
+            for delay_re in _RETRY_DELAY_RES:
+                delay_match = delay_re.search(error_text)
+                if delay_match:
+                    extracted_delay = float(delay_match.group(1))
+                    delay = max(extracted_delay + 10, 40)
+                    break
+
+            logger.warning("Rate limit error, pausing requests for %.1f seconds...", delay)
+            limiter.pause(delay)
+
+        return None, None
+
+
+def _synthesize_group(
+    group: List[str],
+    note_style: str,
+    user_prompt: Optional[str],
+    limiter: Optional[RateLimiter]
+) -> str:
+    """First-stage synthesis of one group of summaries"""
+    if limiter:
+        limiter.acquire()
+    result = llm_service.synthesize_notes(group, note_style, user_prompt)
+    return result['text']
+
+
 @celery.task(bind=True, base=CallbackTask, acks_late=True, max_retries=3)
 def generate_notes_task(
     self,
@@ -55,34 +249,18 @@ def generate_notes_task(
         db.update_note_status(note_id, 'retrieving')
         self.update_state(state='PROGRESS', meta={'step': 'retrieving_chunks'})
 
-        # Step 1: Retrieve chunks from ChromaDB for all document_ids
+        # Step 1: Retrieve chunks from ChromaDB for all document_ids. Imported
+        # here so the notes worker only loads Chroma (and, through it, the
+        # embedding model) once a task actually runs
+        from app.services.vectorstore import get_collection
+
         collection = get_collection(collection_name)
         all_chunks = []
 
-        for doc_id in document_ids:
-            try:
-                # Query ChromaDB for chunks with this document_id
-                # Using the underlying ChromaDB collection's get method
-                results = collection._collection.get(
-                    where={"document_id": doc_id},
-                    include=["documents", "metadatas"]
-                )
-
-                if results and results.get("documents"):
-                    for i, doc_text in enumerate(results["documents"]):
-                        chunk_index = i
-                        if results.get("metadatas") and i < len(results["metadatas"]):
-                            chunk_index = results["metadatas"][i].get("chunk_index", i)
-
-                        all_chunks.append({
-                            "text": doc_text,
-                            "document_id": doc_id,
-                            "chunk_index": chunk_index,
-                            "chroma_id": results["ids"][i] if results.get("ids") and i < len(results["ids"]) else None
-                        })
-            except Exception as e:
-                print(f"Warning: Error retrieving chunks for document {doc_id}: {e}")
-                continue
+        try:
+            all_chunks = list(_iter_document_chunks(collection, document_ids))
+        except Exception as e:
+            logger.warning("Error retrieving chunks for documents %s: %s", document_ids, e)
 
         if not all_chunks:
             raise ValueError(
@@ -91,38 +269,42 @@ def generate_notes_task(
             )
 
         # Sort chunks by document_id and chunk_index to maintain order
-        all_chunks.sort(key=lambda x: (x["document_id"], x["chunk_index"]))
+        all_chunks.sort(key=itemgetter("document_id", "chunk_index"))
 
-        print(f"Retrieved {len(all_chunks)} raw chunks from {len(document_ids)} documents")
+        logger.info("Retrieved %d raw chunks from %d documents", len(all_chunks), len(document_ids))
 
         # Merge small chunks into larger ones for more efficient note generation
         # Target ~4000 chars per merged chunk (reduces API calls significantly)
         TARGET_CHUNK_SIZE = 10000
         merged_chunks = []
-        current_text = ""
+        # Pieces are joined once per merged chunk; current_len tracks the joined length
+        current_parts: List[str] = []
+        current_len = 0
         current_doc_id = None
         current_start_idx = 0
 
         for chunk in all_chunks:
             # If switching documents or chunk would be too large, save current and start new
-            if current_doc_id != chunk["document_id"] or len(current_text) + len(chunk["text"]) > TARGET_CHUNK_SIZE:
-                if current_text:
+            if current_doc_id != chunk["document_id"] or current_len + len(chunk["text"]) > TARGET_CHUNK_SIZE:
+                if current_len:
                     merged_chunks.append({
-                        "text": current_text.strip(),
+                        "text": "\n\n".join(current_parts).strip(),
                         "document_id": current_doc_id,
                         "chunk_index": current_start_idx,
                         "chroma_id": None  # Merged chunks don't have a single chroma_id
                     })
-                current_text = chunk["text"]
+                current_parts = [chunk["text"]]
+                current_len = len(chunk["text"])
                 current_doc_id = chunk["document_id"]
                 current_start_idx = chunk["chunk_index"]
             else:
-                current_text += "\n\n" + chunk["text"]
+                current_parts.append(chunk["text"])
+                current_len += 2 + len(chunk["text"])
 
         # Don't forget the last chunk
-        if current_text:
+        if current_len:
             merged_chunks.append({
-                "text": current_text.strip(),
+                "text": "\n\n".join(current_parts).strip(),
                 "document_id": current_doc_id,
                 "chunk_index": current_start_idx,
                 "chroma_id": None
@@ -130,117 +312,127 @@ def generate_notes_task(
 
         # Use merged chunks for processing
         all_chunks = merged_chunks
-        print(f"Merged into {len(all_chunks)} chunks for note generation (target: {TARGET_CHUNK_SIZE} chars each)")
+        logger.info(
+            "Merged into %d chunks for note generation (target: %d chars each)",
+            len(all_chunks), TARGET_CHUNK_SIZE
+        )
 
-        # Step 2: Summarize chunks
+        # Step 2: Summarize chunks concurrently; the limiter is shared through
+        # Redis so notes tasks on every worker stay within one Gemini quota
         db.update_note_status(note_id, 'summarizing')
-        summaries = []
-        total_tokens = 0
-        successful_summaries = 0
-        failed_summaries = 0
-
+        limiter = RedisRateLimiter(_gemini_requests_per_minute()) if llm_service.provider == "gemini" else None
+        # No point holding more requests in flight than the quota admits per window
+        concurrency = settings.notes_summary_concurrency
+        if limiter:
+            concurrency = min(concurrency, limiter.max_calls)
+        results = [(None, None)] * len(all_chunks)
+
+        # A redelivered or retried run reuses the summaries an earlier attempt
+        # stored (e.g. before synthesis failed) instead of paying for them again
+        stored = {
+            (summary['document_id'], summary['chunk_index']): summary
+            for summary in db.get_summaries_by_note(note_id)
+        }
+        pending = []
         for i, chunk in enumerate(all_chunks):
-            self.update_state(
-                state='PROGRESS',
-                meta={
-                    'step': 'summarizing_chunks',
-                    'current': i + 1,
-                    'total': len(all_chunks)
-                }
-            )
-
-            # Generate summary for chunk with specified style
+            summary = stored.get((chunk['document_id'], chunk['chunk_index']))
+            if summary:
+                results[i] = (summary, summary['summary_text'].removeprefix('[Fallback] '))
+            else:
+                pending.append(i)
+        if stored:
+            logger.info("Reusing %d stored summaries for note %s", len(all_chunks) - len(pending), note_id)
+
+        # Chunks summarized before with the same style, prompt and model (a
+        # regenerated note, a document shared between notes) skip the LLM
+        remaining = pending
+        cache_keys = {}
+        if settings.summary_cache_ttl_days > 0 and llm_service.provider in ("gemini", "openai"):
+            cache_keys = {
+                i: _summary_cache_key(all_chunks[i]["text"], note_style, user_prompt) for i in pending
+            }
+            try:
+                cached = db.get_cached_summaries(
+                    list(set(cache_keys.values())), settings.summary_cache_ttl_days
+                )
+            except Exception as e:
+                logger.warning("Summary cache lookup failed: %s", e)
+                cached = {}
+            for i in pending:
+                hit = cached.get(cache_keys[i])
+                if hit:
+                    result = {
+                        'text': hit['summary_text'],
+                        'provider': hit.get('llm_provider'),
+                        'model': hit.get('llm_model'),
+                        'tokens_used': 0
+                    }
+                    results[i] = (_summary_record(all_chunks[i], note_id, result), result['text'])
+            remaining = [i for i in pending if results[i][0] is None]
+            if len(remaining) < len(pending):
+                logger.info("Summary cache hits: %d of %d chunks", len(pending) - len(remaining), len(pending))
+
+        # Large OpenAI jobs can go through the Batch API (half price, no RPM
+        # limit); whatever it doesn't return is summarized per chunk below
+        generated = remaining
+        use_batch = settings.use_batch_api and llm_service.provider == "openai"
+        if use_batch and len(remaining) > BATCH_API_THRESHOLD:
             try:
-                result = llm_service.generate_summary(
-                    chunk["text"],
-                    note_style=note_style,
-                    user_prompt=user_prompt
+                batch_results = llm_service.generate_summaries_batch(
+                    [all_chunks[i]["text"] for i in remaining], note_style, user_prompt
+                )
+            except Exception as e:
+                logger.warning("Batch summarization failed, summarizing per chunk: %s", e)
+                batch_results = [None] * len(remaining)
+            for i, result in zip(remaining, batch_results, strict=True):
+                if result and result.get('text'):
+                    results[i] = (_summary_record(all_chunks[i], note_id, result), result['text'])
+            remaining = [i for i in remaining if results[i][0] is None]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {
+                pool.submit(_summarize_chunk, all_chunks[i], i, note_id, note_style, user_prompt, limiter): i
+                for i in remaining
+            }
+            for done, future in enumerate(as_completed(futures), len(all_chunks) - len(remaining) + 1):
+                results[futures[future]] = future.result()
+                self.update_state(
+                    state='PROGRESS',
+                    meta={
+                        'step': 'summarizing_chunks',
+                        'current': done,
+                        'total': len(all_chunks)
+                    }
                 )
 
-                # Validate that result contains required fields
-                if not result or not result.get('text'):
-                    raise ValueError(f"LLM service returned empty result for chunk {i}")
-
-                # Store summary in database
-                summary_data = {
-                    'note_id': note_id,
-                    'document_id': chunk["document_id"],
-                    'chroma_chunk_id': chunk["chroma_id"],
-                    'chunk_index': chunk["chunk_index"],
-                    'summary_text': result['text'],
-                    'llm_provider': result.get('provider', 'unknown'),
-                    'llm_model': result.get('model', 'unknown'),
-                    'tokens_used': result.get('tokens_used', 0)
-                }
-                db.create_summary(summary_data)
-
-                summaries.append(result['text'])
-                total_tokens += result.get('tokens_used', 0)
-                successful_summaries += 1
-
-                # Rate limiting: Gemini free tier allows 10 requests/minute for Flash, 2 for Pro
-                if llm_service.provider == "gemini" and i < len(all_chunks) - 1:
-                    model_name = settings.gemini_model.lower()
-                    if "flash" in model_name:
-                        delay = 7
-                    else:
-                        delay = 45
-                    print(f"Rate limiting: waiting {delay} seconds before processing next chunk...")
-                    time.sleep(delay)
+        # Store new summaries in database, in chunk order, with one insert
+        db.create_summaries([results[i][0] for i in pending if results[i][0] is not None])
 
+        # Cache fresh LLM summaries (not extractive fallbacks) for later notes
+        if cache_keys:
+            fresh = {
+                cache_keys[i]: results[i][0] for i in generated
+                if results[i][0] is not None and results[i][0]['llm_provider'] != 'fallback'
+            }
+            try:
+                db.put_cached_summaries([
+                    {
+                        'key': key,
+                        'summary_text': record['summary_text'],
+                        'llm_provider': record['llm_provider'],
+                        'llm_model': record['llm_model']
+                    }
+                    for key, record in fresh.items()
+                ])
             except Exception as e:
-                failed_summaries += 1
-                error_msg = f"Error summarizing chunk {i}: {str(e)}"
-                print(error_msg)
-
-                # Fallback for safety blocks: extract key sentences from the chunk
-                if "SAFETY" in str(e) or "blocked" in str(e).lower():
-                    try:
-                        sentences = chunk["text"].split('.')
-                        key_sentences = [s.strip() for s in sentences if len(s.strip()) > 20][:3]
-                        if key_sentences:
-                            fallback_summary = ". ".join(key_sentences) + "."
-                            print(f"Using fallback summary for chunk {i} due to safety block")
-
-                            summary_data = {
-                                'note_id': note_id,
-                                'document_id': chunk["document_id"],
-                                'chroma_chunk_id': chunk["chroma_id"],
-                                'chunk_index': chunk["chunk_index"],
-                                'summary_text': f"[Fallback] {fallback_summary}",
-                                'llm_provider': 'fallback',
-                                'llm_model': 'extractive',
-                                'tokens_used': 0
-                            }
-                            db.create_summary(summary_data)
-                            summaries.append(fallback_summary)
-                            successful_summaries += 1
-                            continue
-                    except Exception as fallback_error:
-                        print(f"Fallback extraction also failed: {fallback_error}")
-
-                # Handle rate limit errors
-                error_str = str(e).lower()
-                if llm_service.provider == "gemini" and ("429" in error_str or "quota" in error_str or "rate limit" in error_str):
-                    if i < len(all_chunks) - 1:
-                        import re
-                        model_name = settings.gemini_model.lower()
-                        delay = 60 if "flash" in model_name else 90
-
-                        delay_patterns = [
-                            r'retry\s+in\s+(\d+(?:\.\d+)?)\s*s\.?',
-                            r'retry\s+in\s+(\d+(?:\.\d+)?)',
-                            r'(\d+(?:\.\d+)?)\s*seconds',
-                        ]
-                        for pattern in delay_patterns:
-                            delay_match = re.search(pattern, str(e), re.IGNORECASE)
-                            if delay_match:
-                                extracted_delay = float(delay_match.group(1))
-                                delay = max(extracted_delay + 10, 40)
-                                break
-
-                        print(f"Rate limit error, waiting {delay:.1f} seconds...")
-                        time.sleep(delay)
+                logger.warning("Summary cache store failed: %s", e)
+
+        summary_records = [summary_data for summary_data, _ in results if summary_data is not None]
+        summaries = [summary_text for _, summary_text in results if summary_text is not None]
+
+        total_tokens = sum(record.get('tokens_used') or 0 for record in summary_records)
+        successful_summaries = len(summary_records)
+        failed_summaries = len(results) - successful_summaries
 
         # Only proceed to synthesis if we have summaries
         if successful_summaries == 0:
@@ -256,14 +448,21 @@ def generate_notes_task(
 
         # For hierarchical synthesis with many summaries, do it in stages
         if len(summaries) > 20:
-            intermediate_summaries = []
-            for i in range(0, len(summaries), 10):
-                group = summaries[i:i+10]
-                result = llm_service.synthesize_notes(group, note_style, user_prompt)
-                intermediate_summaries.append(result['text'])
-
+            # Groups are synthesized concurrently under the same rate limit;
+            # map() keeps the intermediate summaries in group order
+            groups = [summaries[i:i+10] for i in range(0, len(summaries), 10)]
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                intermediate_summaries = list(pool.map(
+                    lambda group: _synthesize_group(group, note_style, user_prompt, limiter),
+                    groups
+                ))
+
+            if limiter:
+                limiter.acquire()
             final_result = llm_service.synthesize_notes(intermediate_summaries, note_style, user_prompt)
         else:
+            if limiter:
+                limiter.acquire()
             final_result = llm_service.synthesize_notes(summaries, note_style, user_prompt)
 
         # Update note with final content
@@ -280,39 +479,24 @@ def generate_notes_task(
 
         db.update_note_content(note_id, final_result['text'], metadata)
 
-        # Save note as markdown file locally if enabled
+        # Write the local markdown copy in a separate task so this worker is
+        # free for the next note
         if settings.save_notes_locally:
             try:
-                # Get note record to include in filename
-                note_record = db.get_note(note_id)
-                title = note_record.get('title', '') if note_record else ''
-
-                # Generate markdown filename
-                md_filename = f"note_{note_id[:8]}_{title or 'untitled'}.md".replace(' ', '_')
-                md_file_path = os.path.join(settings.notes_dir, md_filename)
-
-                # Ensure notes directory exists
-                os.makedirs(settings.notes_dir, exist_ok=True)
-
-                # Prepare metadata for frontmatter
-                frontmatter_metadata = {
-                    'note_id': note_id,
-                    'title': title,
-                    'document_ids': document_ids,
-                    'note_style': note_style,
-                    'llm_provider': final_result.get('provider'),
-                    'llm_model': final_result.get('model'),
-                    'tokens_used': metadata['tokens_used'],
-                }
-
-                save_note_as_markdown(
-                    note_text=final_result['text'],
-                    output_path=md_file_path,
-                    metadata=frontmatter_metadata
+                save_note_markdown_task.delay(
+                    note_id,
+                    final_result['text'],
+                    {
+                        'note_id': note_id,
+                        'document_ids': document_ids,
+                        'note_style': note_style,
+                        'llm_provider': final_result.get('provider'),
+                        'llm_model': final_result.get('model'),
+                        'tokens_used': metadata['tokens_used'],
+                    }
                 )
-                print(f"Note saved locally as markdown: {md_file_path}")
             except Exception as e:
-                print(f"Warning: Failed to save note locally as markdown: {str(e)}")
+                logger.warning("Failed to queue local markdown save: %s", e)
 
         return {
             'status': 'completed',
@@ -327,6 +511,41 @@ def generate_notes_task(
         raise
 
 
+@celery.task(acks_late=True, autoretry_for=(OSError,), max_retries=3)
+def save_note_markdown_task(note_id: str, note_text: str, metadata: Dict[str, Any]):
+    """
+    Save a generated note as a local markdown file.
+
+    Args:
+        note_id: Note identifier
+        note_text: Final note content
+        metadata: Frontmatter fields (title is looked up here)
+    """
+    # Get note record to include in filename
+    note_record = db.get_note(note_id)
+    title = note_record.get('title', '') if note_record else ''
+
+    # Generate markdown filename
+    md_filename = f"note_{note_id[:8]}_{title or 'untitled'}.md".replace(' ', '_')
+    md_file_path = os.path.join(settings.notes_dir, md_filename)
+
+    # save_note_as_markdown creates the notes directory if needed
+    save_note_as_markdown(
+        note_text=note_text,
+        output_path=md_file_path,
+        metadata={**metadata, 'title': title}
+    )
+    logger.info("Note saved locally as markdown: %s", md_file_path)
+    return md_file_path
+
+
+@celery.task
+def sweep_summary_cache_task():
+    """Drop summary cache entries past their TTL (scheduled via Celery Beat)"""
+    if settings.summary_cache_ttl_days > 0:
+        db.delete_expired_cached_summaries(settings.summary_cache_ttl_days)
+
+
 @celery.task(bind=True, acks_late=True)
 def cleanup_old_notes_task(self, days_old: int = 30):
     """
@@ -1,17 +1,116 @@
 # app/tasks.py
-import asyncio
+import hashlib
 import logging
 import os
-import uuid
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from itertools import islice
+from typing import TypeVar
 
 from app.celery_app import celery
-from app.services.chunker import chunk_text
-from app.services.pdf_loader import extract_text_from_pdf
-from app.services.vectorstore import get_collection
+from app.services.chunker import iter_chunks
+from app.services.pdf_loader import iter_pdf_pages
 
 logger = logging.getLogger(__name__)
 
-BATCH_SIZE = 50
+T = TypeVar("T")
+
+# Chunks embedded and written per batch; large enough that the embedder's
+# forward passes and Chroma's write transactions are amortized, and capped
+# at 1000 so a single upsert stays well under Chroma's max batch size
+BATCH_SIZE = min(int(os.getenv("CHROMA_BATCH_SIZE", "256")), 1000)
+
+
+def _chunk_id_suffix(unique_filename: str, chunk_index: int) -> str:
+    """Short stable hash keeping chunk IDs in their original name-index-hex form"""
+    return hashlib.blake2b(f"{unique_filename}:{chunk_index}".encode(), digest_size=4).hexdigest()
+
+
+class _PrintableTable(dict):
+    """str.translate table keeping printable characters plus tab/CR/LF, filled in per code point"""
+
+    def __missing__(self, codepoint: int) -> int | None:
+        char = chr(codepoint)
+        self[codepoint] = codepoint if char.isprintable() or char in '\n\r\t' else None
+        return self[codepoint]
+
+
+_PRINTABLE_TABLE = _PrintableTable()
+
+# ASCII control characters the table above drops (everything but tab/CR/LF)
+_ASCII_CONTROL_BYTES = bytes(
+    b for b in range(128) if not (chr(b).isprintable() or chr(b) in '\n\r\t')
+)
+
+
+def _clean_chunk(chunk: str) -> str | None:
+    """Strip Unicode debris from a raw chunk; None if nothing usable is left"""
+    if not chunk or not chunk.strip():
+        return None
+
+    # Clean Unicode - drop non-printable characters, including the lone
+    # surrogates common in poorly extracted PDFs, in one C-level pass
+    try:
+        if chunk.isascii():
+            # Most extracted text is ASCII; deleting bytes skips the per-code-point table
+            clean_chunk = chunk.encode('ascii').translate(None, _ASCII_CONTROL_BYTES).decode('ascii')
+        else:
+            clean_chunk = chunk.translate(_PRINTABLE_TABLE)
+        return clean_chunk.strip() or None
+    except Exception as e:
+        logger.warning(f"Failed to clean chunk: {e}, skipping")
+        return None
+
+
+def _prefetch(items: Iterable[T], maxsize: int = 2) -> Iterator[T]:
+    """
+    Produce items in a background thread, keeping up to maxsize ready.
+
+    Lets PDF extraction and chunking (pure Python) run while the caller embeds
+    the previous batch. Producer errors are re-raised in the caller; closing
+    the iterator early stops the producer.
+    """
+    ready: queue.Queue = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        error = None
+        try:
+            for item in items:
+                if not put((True, item)):
+                    return
+        except BaseException as e:
+            error = e
+        finally:
+            # Always send the end marker, or the consumer would wait forever
+            put((False, error))
+
+    producer = threading.Thread(target=produce, name="pdf-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            has_item, item = ready.get()
+            if not has_item:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
 
 @celery.task(bind=True)
 def process_pdf(
@@ -34,56 +133,28 @@ def process_pdf(
     if not unique_filename:
         unique_filename = file_path
 
+    # Imported here: document_service would be a circular import (its
+    # Supabase client is synchronous, so status updates need no event loop),
+    # and Chroma and the embedding model should load on first use rather
+    # than whenever a worker imports its task modules
+    from app.services.document_service import update_document_status_sync
+    from app.services.embedding_cache import embed_documents_cached
+    from app.services.semantic_cache import invalidate_collection
+    from app.services.vectorstore import get_collection
+
     try:
         # Update document status to processing if document_id provided
         if document_id:
             try:
-                # Import here to avoid circular imports
-                from app.services.document_service import update_document_status
-                asyncio.run(update_document_status(document_id, 'processing'))
+                update_document_status_sync(document_id, 'processing')
                 logger.info(f"Updated document {document_id} status to processing")
             except Exception as e:
                 logger.warning(f"Could not update document status to processing: {e}")
 
-        # Extract text from PDF
-        documents = extract_text_from_pdf(file_path)
-        if not documents:
-            raise ValueError(f"No text extracted from PDF: {file_path}")
-
-        text = " ".join(doc.page_content for doc in documents)
-        if not text.strip():
-            raise ValueError(f"No text extracted from PDF: {file_path}")
-        logger.info(f"Extracted text length: {len(text)}")
-
-        # Chunk the text
-        chunks = chunk_text(text)
-        if not chunks:
-            raise ValueError("No chunks created from text")
-
-        # Ensure all chunks are valid strings and clean Unicode issues
-        cleaned_chunks = []
-        for chunk in chunks:
-            if not chunk or not str(chunk).strip():
-                continue
-
-            # Clean Unicode - remove surrogates and normalize
-            try:
-                # Remove surrogate pairs (common in poorly extracted PDFs)
-                clean_chunk = chunk.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-                # Remove any remaining non-printable or problematic characters
-                clean_chunk = ''.join(char for char in clean_chunk if char.isprintable() or char in '\n\r\t ')
-                clean_chunk = clean_chunk.strip()
-
-                if clean_chunk:
-                    cleaned_chunks.append(clean_chunk)
-            except Exception as e:
-                logger.warning(f"Failed to clean chunk: {e}, skipping")
-                continue
-
-        if not cleaned_chunks:
-            raise ValueError("No valid chunks created from text after filtering and cleaning")
-
-        logger.info(f"Created {len(cleaned_chunks)} valid chunks (cleaned from {len(chunks)} raw chunks)")
+        # Stream pages -> chunks -> cleaned chunks; only one window of text and
+        # one batch of chunks are held in memory, however large the PDF
+        pages = (doc.page_content for doc in iter_pdf_pages(file_path))
+        chunk_iter = filter(None, map(_clean_chunk, iter_chunks(pages)))
 
         # Get user-specific collection if user_id provided, otherwise use default
         collection_name = f"user_{user_id}_docs" if user_id else "default_docs"
@@ -91,111 +162,104 @@ def process_pdf(
         if collection is None:
             raise ValueError(f"Failed to get ChromaDB collection: {collection_name}")
 
-        total_chunks = len(cleaned_chunks)
+        total_chunks = 0
         processed_chunks = 0
-        chunk_ids = []
-        logger.info(f"Total chunks to process: {total_chunks}")
-
-        # Process chunks in batches
-        for start_idx in range(0, total_chunks, BATCH_SIZE):
-            batch_chunks = cleaned_chunks[start_idx : start_idx + BATCH_SIZE]
-            batch_size = len(batch_chunks)
-
-            logger.info(
-                f"Processing batch {start_idx // BATCH_SIZE + 1}: {batch_size} chunks"
-            )
-
-            # Generate unique IDs for each chunk
-            batch_ids = [
-                f"{unique_filename}-{start_idx + i}-{uuid.uuid4().hex[:8]}" 
-                for i in range(batch_size)
-            ]
-            # Store chunk IDs for database update
-            chunk_ids.extend(batch_ids)
-
-            # Create metadata for each chunk
-            batch_metadatas = [
-                {
-                    "source": file_path,
-                    "original_filename": original_filename,
-                    "unique_filename": unique_filename,
-                    "user_id": user_id,
-                    "document_id": document_id,
-                    "chunk_index": start_idx + i,
-                    "batch": start_idx // BATCH_SIZE + 1,
-                    "total_chunks": total_chunks,
-                    "chunk_length": len(batch_chunks[i]),
-                }
-                for i in range(batch_size)
-            ]
 
-            try:
-                # Validate and ensure all batch chunks are proper strings
-                validated_chunks = []
-                for chunk in batch_chunks:
-                    if not isinstance(chunk, str):
-                        logger.warning(f"Non-string chunk detected: {type(chunk)}, converting to string")
-                        chunk = str(chunk)
-                    if not chunk.strip():
-                        logger.warning("Empty chunk detected, skipping")
-                        continue
-                    validated_chunks.append(chunk.strip())
-
-                if not validated_chunks:
-                    logger.error("No valid chunks in batch after validation")
-                    continue
-
-                # Debug logging
-                logger.info(f"About to add {len(validated_chunks)} chunks to ChromaDB")
-                logger.info(f"Chunk types: {[type(c).__name__ for c in validated_chunks[:3]]}")
-                logger.info(f"First chunk preview: {repr(validated_chunks[0][:100]) if validated_chunks else 'N/A'}")
-
-                # Final safety check - ensure texts is a proper list of strings
-                # Convert to list explicitly to avoid any iterator/generator issues
-                safe_texts = list(validated_chunks)
-
-                # Verify all are strings
-                for i, chunk in enumerate(safe_texts):
-                    if not isinstance(chunk, str):
-                        logger.error(f"Chunk {i} is not a string: {type(chunk)}")
-                        raise TypeError(f"Invalid chunk type at index {i}: {type(chunk)}")
-
-                logger.info(f"Safe texts count: {len(safe_texts)}, type: {type(safe_texts)}")
-
-                # Add chunks to ChromaDB - pass as standard list
-                ids = collection.add_texts(
-                    texts=safe_texts,
-                    metadatas=list(batch_metadatas[:len(safe_texts)]),
-                    ids=list(batch_ids[:len(safe_texts)])
-                )
-                processed_chunks += batch_size
-                logger.info(
-                    f"Saved batch {start_idx // BATCH_SIZE + 1} to ChromaDB with {len(ids)} documents"
+        # Metadata fields that are the same for every chunk of this PDF
+        base_metadata = {
+            "source": file_path,
+            "original_filename": original_filename,
+            "unique_filename": unique_filename,
+            "user_id": user_id,
+            "document_id": document_id,
+        }
+
+        # Process chunks in batches; a single writer thread stores batch k
+        # in ChromaDB while batch k+1 is being embedded, and a prefetch thread
+        # extracts and cleans the batches after that
+        pending_write = None
+        batches = _prefetch(iter(lambda: list(islice(chunk_iter, BATCH_SIZE)), []))
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="chroma-writer") as writer, closing(batches):
+            batch_no = 0
+            for batch_chunks in batches:
+                batch_size = len(batch_chunks)
+                batch_no += 1
+                start_idx = total_chunks
+                total_chunks += batch_size
+
+                logger.info(f"Processing batch {batch_no}: {batch_size} chunks")
+
+                # Deterministic IDs: unique_filename is already unique per upload, so
+                # a re-run of the task writes the same IDs instead of duplicates
+                batch_ids = [
+                    f"{unique_filename}-{start_idx + i}-{_chunk_id_suffix(unique_filename, start_idx + i)}"
+                    for i in range(batch_size)
+                ]
+
+                # Create metadata for each chunk from the shared fields
+                batch_metadatas = [
+                    {
+                        **base_metadata,
+                        "chunk_index": start_idx + i,
+                        "batch": batch_no,
+                        "chunk_length": len(chunk),
+                    }
+                    for i, chunk in enumerate(batch_chunks)
+                ]
+
+                try:
+                    # Cleaned chunks are already non-empty, stripped strings, so the
+                    # batch slice is passed to the embedder and Chroma as-is;
+                    # chunks embedded before (re-uploads, boilerplate) are reused
+                    vectors = embed_documents_cached(batch_chunks)
+
+                    # The previous batch was written while this one was embedded;
+                    # wait for it so at most one write is in flight
+                    if pending_write is not None:
+                        pending_write.result()
+                    pending_write = writer.submit(
+                        collection._collection.upsert,
+                        ids=batch_ids,
+                        embeddings=vectors,
+                        documents=batch_chunks,
+                        metadatas=batch_metadatas
+                    )
+                    processed_chunks += batch_size
+                    logger.info(
+                        f"Queued batch {batch_no} for ChromaDB with {batch_size} documents"
+                    )
+                except Exception as e:
+                    logger.exception(f"Failed to save batch to ChromaDB: {e}")
+                    raise
+
+                # Update task progress
+                self.update_state(
+                    state="PROGRESS",
+                    meta={
+                        "processed": processed_chunks,
+                        "status": f"Processing batch {batch_no}"
+                    },
                 )
-            except Exception as e:
-                logger.exception(f"Failed to save batch to ChromaDB: {e}")
-                raise
-
-            # Update task progress
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "processed": processed_chunks, 
-                    "total": total_chunks,
-                    "status": f"Processing batch {start_idx // BATCH_SIZE + 1}"
-                },
-            )
+
+            # Make sure the last batch is stored (and surface its errors)
+            if pending_write is not None:
+                pending_write.result()
+
+        if not total_chunks:
+            raise ValueError(f"No text extracted from PDF: {file_path}")
+        logger.info(f"Created {total_chunks} valid chunks")
+
+        # Cached answers for this collection no longer reflect its documents
+        invalidate_collection(collection_name)
 
         # Update document status to completed if document_id provided
         if document_id:
             try:
-                from app.services.document_service import update_document_status
-                asyncio.run(update_document_status(
+                update_document_status_sync(
                     document_id,
                     'completed',
-                    chunk_ids=chunk_ids,
                     total_chunks=total_chunks
-                ))
+                )
                 logger.info(f"Updated document {document_id} status to completed")
             except Exception as e:
                 logger.warning(f"Could not update document status to completed: {e}")
@@ -209,7 +273,6 @@ def process_pdf(
             "total_chunks": total_chunks,
             "user_id": user_id,
             "document_id": document_id,
-            "chunk_ids": chunk_ids[:10],  # Return first 10 chunk IDs for reference
             "collection_name": collection_name
         }
 
@@ -217,14 +280,22 @@ def process_pdf(
         # Update document status to failed if document_id provided
         if document_id:
             try:
-                from app.services.document_service import update_document_status
-                asyncio.run(update_document_status(
+                update_document_status_sync(
                     document_id,
                     'failed',
                     error=str(e)
-                ))
+                )
                 logger.info(f"Updated document {document_id} status to failed")
             except Exception as update_e:
                 logger.warning(f"Could not update document status to failed: {update_e}")
         logger.exception(f"Failed to process PDF {file_path}: {e}")
         raise
+
+
+@celery.task
+def sweep_semantic_cache():
+    """Drop expired answers from the semantic cache and enforce its size cap"""
+    from app.services.semantic_cache import sweep_cache
+
+    removed = sweep_cache()
+    return {"removed": removed}
@@ -1,33 +1,9 @@
+import os
 import tiktoken
-import nltk
 from typing import List, Dict, Any
 
 from app.config import settings
-
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-    # Test if the data is actually valid by trying to use it
-    nltk.sent_tokenize("Test sentence.")
-except (LookupError, Exception):
-    # If data is missing or corrupted, download it
-    import shutil
-    import os
-    # Remove corrupted data if it exists
-    punkt_path = None
-    for path in nltk.data.path:
-        potential_path = os.path.join(path, 'tokenizers', 'punkt')
-        if os.path.exists(potential_path):
-            punkt_path = potential_path
-            break
-    if punkt_path:
-        try:
-            shutil.rmtree(punkt_path)
-        except Exception:
-            pass
-    # Download fresh data
-    nltk.download('punkt', quiet=True)
-    nltk.download('punkt_tab', quiet=True)
+from app.services.text_patterns import SENTENCE_BOUNDARY_RE
 
 
 class TextChunker:
@@ -46,8 +22,18 @@ class TextChunker:
         return len(self.encoding.encode(text))
     
     def split_into_sentences(self, text: str) -> List[str]:
-        """Split text into sentences using NLTK"""
-        return nltk.sent_tokenize(text)
+        """Split text into sentences on terminal punctuation"""
+        return [
+            sentence for sentence in SENTENCE_BOUNDARY_RE.split(text.strip())
+            if sentence
+        ]
+    
+    def count_sentence_tokens(self, sentences: List[str]) -> List[int]:
+        """Count tokens of many sentences in one batched, multi-threaded encode"""
+        token_lists = self.encoding.encode_ordinary_batch(
+            sentences, num_threads=os.cpu_count() or 1
+        )
+        return [len(tokens) for tokens in token_lists]
     
     def chunk_text(self, text: str, metadata: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
@@ -61,12 +47,36 @@ class TextChunker:
             List of chunk dictionaries with text, token_count, and metadata
         """
         sentences = self.split_into_sentences(text)
+        return self._chunk_sentences(
+            sentences, self.count_sentence_tokens(sentences), metadata
+        )
+    
+    def _chunk_sentences(
+        self,
+        sentences: List[str],
+        sentence_counts: List[int],
+        metadata: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Pack sentences (with precomputed token counts) into overlapping chunks.
+        
+        A chunk packed from whole sentences reports the sum of their counts
+        as token_count instead of encoding the joined text again; the two
+        can differ by a token where sentences meet. Pieces of over-long
+        sentences are still counted exactly, since per-word costs include
+        the trailing space and overestimate.
+        """
         chunks = []
         current_chunk = []
+        # Token count of each sentence in current_chunk, so the overlap can be
+        # measured without encoding those sentences again
+        current_counts = []
         current_tokens = 0
+        # Token cost of each distinct word (with its trailing space) seen while
+        # splitting over-long sentences; documents repeat most of their vocabulary
+        word_costs: Dict[str, int] = {}
         
-        for sentence in sentences:
-            sentence_tokens = self.count_tokens(sentence)
+        for sentence, sentence_tokens in zip(sentences, sentence_counts, strict=True):
             
             # If a single sentence exceeds chunk_size, split it by words
             if sentence_tokens > self.chunk_size:
@@ -75,10 +85,11 @@ class TextChunker:
                     chunk_text = " ".join(current_chunk)
                     chunks.append({
                         'text': chunk_text,
-                        'token_count': self.count_tokens(chunk_text),
+                        'token_count': current_tokens,
                         'metadata': metadata or {}
                     })
                     current_chunk = []
+                    current_counts = []
                     current_tokens = 0
                 
                 # Split long sentence by words
@@ -87,7 +98,9 @@ class TextChunker:
                 word_tokens = 0
                 
                 for word in words:
-                    word_token_count = self.count_tokens(word + " ")
+                    if word not in word_costs:
+                        word_costs[word] = self.count_tokens(word + " ")
+                    word_token_count = word_costs[word]
                     if word_tokens + word_token_count > self.chunk_size and word_chunk:
                         chunk_text = " ".join(word_chunk)
                         chunks.append({
@@ -99,7 +112,7 @@ class TextChunker:
                         overlap_words = []
                         overlap_tokens = 0
                         for w in reversed(word_chunk):
-                            w_tokens = self.count_tokens(w + " ")
+                            w_tokens = word_costs[w]
                             if overlap_tokens + w_tokens <= self.chunk_overlap:
                                 overlap_words.insert(0, w)
                                 overlap_tokens += w_tokens
@@ -115,6 +128,7 @@ class TextChunker:
                     chunk_text = " ".join(word_chunk)
                     current_chunk = [chunk_text]
                     current_tokens = self.count_tokens(chunk_text)
+                    current_counts = [current_tokens]
             
             # Normal sentence processing
             elif current_tokens + sentence_tokens > self.chunk_size:
@@ -123,28 +137,29 @@ class TextChunker:
                     chunk_text = " ".join(current_chunk)
                     chunks.append({
                         'text': chunk_text,
-                        'token_count': self.count_tokens(chunk_text),
+                        'token_count': current_tokens,
                         'metadata': metadata or {}
                     })
                     
-                    # Keep overlap
-                    overlap_sentences = []
+                    # Keep overlap: the longest tail of sentences that fits
                     overlap_tokens = 0
-                    for sent in reversed(current_chunk):
-                        sent_tokens = self.count_tokens(sent)
-                        if overlap_tokens + sent_tokens <= self.chunk_overlap:
-                            overlap_sentences.insert(0, sent)
-                            overlap_tokens += sent_tokens
-                        else:
+                    keep = 0
+                    for sent_tokens in reversed(current_counts):
+                        if overlap_tokens + sent_tokens > self.chunk_overlap:
                             break
+                        overlap_tokens += sent_tokens
+                        keep += 1
                     
-                    current_chunk = overlap_sentences
+                    current_chunk = current_chunk[len(current_chunk) - keep:]
+                    current_counts = current_counts[len(current_counts) - keep:]
                     current_tokens = overlap_tokens
                 
                 current_chunk.append(sentence)
+                current_counts.append(sentence_tokens)
                 current_tokens += sentence_tokens
             else:
                 current_chunk.append(sentence)
+                current_counts.append(sentence_tokens)
                 current_tokens += sentence_tokens
         
         # Add the last chunk
@@ -152,7 +167,7 @@ class TextChunker:
             chunk_text = " ".join(current_chunk)
             chunks.append({
                 'text': chunk_text,
-                'token_count': self.count_tokens(chunk_text),
+                'token_count': current_tokens,
                 'metadata': metadata or {}
             })
         
@@ -173,15 +188,26 @@ class TextChunker:
         """
         all_chunks = []
         
-        for page_data in pages_data:
+        # Encode the sentences of every page in one batch, then regroup by page
+        page_sentences = [
+            self.split_into_sentences(page_data['text']) for page_data in pages_data
+        ]
+        counts = self.count_sentence_tokens(
+            [sentence for sentences in page_sentences for sentence in sentences]
+        )
+        
+        start = 0
+        for page_data, sentences in zip(pages_data, page_sentences, strict=True):
             page_num = page_data['page_number']
-            text = page_data['text']
+            end = start + len(sentences)
             
-            page_chunks = self.chunk_text(
-                text,
+            page_chunks = self._chunk_sentences(
+                sentences,
+                counts[start:end],
                 metadata={'page_start': page_num, 'page_end': page_num}
             )
             all_chunks.extend(page_chunks)
+            start = end
         
         return all_chunks
 
@@ -1,9 +1,13 @@
 import hashlib
+import mmap
 import os
 import json
 from pathlib import Path
 from datetime import datetime
 
+# Directories this process has already created; saves a mkdir per saved note
+_ENSURED_DIRS: set[str] = set()
+
 
 def compute_file_hash(file_path: str) -> str:
     """
@@ -18,9 +22,12 @@ def compute_file_hash(file_path: str) -> str:
     sha256_hash = hashlib.sha256()
     
     with open(file_path, "rb") as f:
-        # Read file in chunks to handle large files
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
+        # Map the file and hash it in one update call: no Python-level read
+        # loop, and the OS pages large files in on demand. Empty files
+        # cannot be mapped (their hash is that of no data)
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                sha256_hash.update(mm)
     
     return sha256_hash.hexdigest()
 
@@ -64,44 +71,54 @@ def save_note_as_markdown(
     Returns:
         Path to the saved markdown file
     """
-    # Ensure the directory exists
+    # Ensure the directory exists (once per process)
     output_dir = os.path.dirname(output_path)
-    if output_dir:
+    if output_dir and output_dir not in _ENSURED_DIRS:
         ensure_directory(output_dir)
+        _ENSURED_DIRS.add(output_dir)
     
     # Prepare markdown content with frontmatter if metadata provided
-    markdown_content = ""
+    parts = []
     
     if metadata:
         # Add YAML frontmatter
-        markdown_content += "---\n"
-        markdown_content += f"created_at: {datetime.utcnow().isoformat()}\n"
+        parts.append("---\n")
+        parts.append(f"created_at: {datetime.utcnow().isoformat()}\n")
         for key, value in metadata.items():
             if value is not None:
                 # Handle different value types for YAML
                 if isinstance(value, (dict, list)):
                     # Serialize complex types as JSON string or YAML
-                    markdown_content += f"{key}: {json.dumps(value)}\n"
+                    parts.append(f"{key}: {json.dumps(value)}\n")
                 elif isinstance(value, bool):
-                    markdown_content += f"{key}: {str(value).lower()}\n"
+                    parts.append(f"{key}: {str(value).lower()}\n")
                 elif isinstance(value, (int, float)):
-                    markdown_content += f"{key}: {value}\n"
+                    parts.append(f"{key}: {value}\n")
                 else:
                     # Escape strings that might contain special YAML characters
                     value_str = str(value)
                     if ':' in value_str or '\n' in value_str:
                         # Use JSON string format for strings with special chars
-                        markdown_content += f"{key}: {json.dumps(value_str)}\n"
+                        parts.append(f"{key}: {json.dumps(value_str)}\n")
                     else:
-                        markdown_content += f"{key}: {value_str}\n"
-        markdown_content += "---\n\n"
+                        parts.append(f"{key}: {value_str}\n")
+        parts.append("---\n\n")
     
     # Add the note content
-    markdown_content += note_text
-    
-    # Write to file
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(markdown_content)
+    parts.append(note_text)
+    markdown_content = "".join(parts)
+    
+    # Write to file in a single write call
+    try:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(markdown_content)
+    except FileNotFoundError:
+        # Directory was removed after we created it; recreate and retry once
+        if not output_dir:
+            raise
+        ensure_directory(output_dir)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(markdown_content)
     
     return output_path
 
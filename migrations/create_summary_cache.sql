@@ -0,0 +1,18 @@
+-- Summary cache: reuse chunk summaries across notes
+-- Run this SQL in your Supabase SQL editor to create the required table
+
+-- Keyed by sha256(note_style | user_prompt | model | chunk text), so a hit
+-- is a summary generated from exactly the same request
+CREATE TABLE IF NOT EXISTS summary_cache (
+    key TEXT PRIMARY KEY,
+    summary_text TEXT NOT NULL,
+    llm_provider TEXT,
+    llm_model TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Used by the TTL sweep
+CREATE INDEX IF NOT EXISTS idx_summary_cache_created_at ON summary_cache(created_at);
+
+-- Only the backend (service role) reads or writes the cache
+ALTER TABLE summary_cache ENABLE ROW LEVEL SECURITY;
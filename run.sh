@@ -8,15 +8,18 @@ echo "Starting Redis server..."
 redis-server --daemonize yes
 sleep 2  # Give Redis a moment to start
 
-# Start Celery worker in the background
-echo "Starting Celery worker..."
-poetry run celery -A app.celery_app worker --loglevel=INFO --pool=solo &
+# Start Celery workers in the background: PDF indexing on the default queue,
+# notes generation (I/O-bound LLM calls) on a thread-pool worker
+echo "Starting Celery workers..."
+poetry run celery -A app.celery_app worker --loglevel=INFO --pool=solo -Q celery -n pdf@%h &
 CELERY_PID=$!
+poetry run celery -A app.celery_app worker --loglevel=INFO --pool=threads --concurrency=8 -Q notes -n notes@%h &
+NOTES_CELERY_PID=$!
 
 # Start FastAPI app (Uvicorn)
 echo "Starting FastAPI server..."
 poetry run uvicorn app.main:app --reload --port 8000
 
 # When FastAPI stops, also stop Celery
-echo "Stopping Celery worker..."
-kill $CELERY_PID
+echo "Stopping Celery workers..."
+kill $CELERY_PID $NOTES_CELERY_PID
@@ -42,6 +42,11 @@ def test_chromadb_client_creation(chroma_client):
     assert chroma_client is not None, "Client should be created"
 
 
+def test_chromadb_client_is_shared():
+    """Test that every caller in the process gets the same ChromaDB client."""
+    assert get_chroma_client() is get_chroma_client(), "Client should be a per-process singleton"
+
+
 def test_list_collections(chroma_client):
     """Test listing ChromaDB collections."""
     collections = chroma_client.list_collections()
@@ -0,0 +1,104 @@
+"""Test the persistent embedding cache's storage round trip."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import embedding_cache
+
+
+class FakeEmbedder:
+    """Deterministic unit vectors, recording which texts were embedded."""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        vectors = []
+        for text in texts:
+            rng = np.random.default_rng(len(text) * 7919 + sum(map(ord, text)))
+            vector = rng.standard_normal(self.dim)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    """Point the cache at an empty database for each test."""
+    monkeypatch.setattr(embedding_cache, "CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(embedding_cache, "_connection", None)
+    yield
+    if embedding_cache._connection is not None:
+        embedding_cache._connection[1].close()
+
+
+def _unit_vector(dim, seed):
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def test_round_trip_stores_float16(cache_db):
+    """Vectors come back within float16 precision, stored at 2 bytes per value."""
+    vectors = {
+        embedding_cache.text_hash(f"t{i}"): _unit_vector(384, i) for i in range(5)
+    }
+
+    embedding_cache.put_many(vectors, model="m")
+    found = embedding_cache.get_many(list(vectors), model="m")
+
+    assert set(found) == set(vectors)
+    for key, vector in vectors.items():
+        assert len(found[key]) == 384
+        assert np.allclose(found[key], vector, atol=1e-3)
+
+    dims_and_sizes = embedding_cache._connect().execute(
+        "SELECT dim, length(vec) FROM embeddings"
+    ).fetchall()
+    assert dims_and_sizes == [(384, 384 * 2)] * 5
+    assert embedding_cache.get_many(list(vectors), model="other") == {}
+
+
+def test_reads_float32_rows(cache_db):
+    """Rows written before the float16 switch still decode exactly."""
+    key = embedding_cache.text_hash("old row")
+    vector = _unit_vector(16, 1)
+    embedding_cache._connect().execute(
+        "INSERT INTO embeddings (hash, model, dim, vec) VALUES (?, ?, ?, ?)",
+        (key, "m", 16, np.asarray(vector, dtype=np.float32).tobytes()),
+    )
+
+    found = embedding_cache.get_many([key], model="m")
+
+    assert found[key] == np.asarray(vector, dtype=np.float32).tolist()
+
+
+def test_row_not_matching_its_dim_is_a_miss(cache_db):
+    """A blob that does not hold exactly dim values is ignored, not misread."""
+    key = embedding_cache.text_hash("bad row")
+    blob = np.zeros(12, dtype=np.float16).tobytes()  # 24 bytes: neither 16*2 nor 16*4
+    embedding_cache._connect().execute(
+        "INSERT INTO embeddings (hash, model, dim, vec) VALUES (?, ?, ?, ?)",
+        (key, "m", 16, blob),
+    )
+
+    assert embedding_cache.get_many([key], model="m") == {}
+
+
+def test_embed_documents_cached_embeds_each_text_once(cache_db, monkeypatch):
+    """Misses are embedded once each; later calls are served from the cache."""
+    embedder = FakeEmbedder()
+    monkeypatch.setattr(embedding_cache, "get_embedder", lambda: embedder)
+
+    texts = ["alpha", "beta", "alpha"]
+    first = embedding_cache.embed_documents_cached(texts)
+    second = embedding_cache.embed_documents_cached(texts)
+
+    assert embedder.embedded == ["alpha", "beta"]
+    assert first[0] == first[2]
+    assert np.allclose(first, second, atol=1e-3)
@@ -8,7 +8,7 @@ import pytest
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.services.chunker import chunk_text
+from app.services.chunker import chunk_text, iter_chunks
 from app.services.pdf_loader import extract_text_from_pdf
 from app.services.vectorstore import get_collection
 
@@ -95,3 +95,46 @@ def test_chromadb_add_chunks(pdf_path):
 
     assert len(ids) == len(test_batch), "Should successfully add all chunks to ChromaDB"
 
+
+def _numbered_pages(page_count: int, words_per_page: int) -> list[str]:
+    """Pages of unique words, so lost or repeated text is easy to spot."""
+    return [
+        " ".join(f"p{page}w{word}" for word in range(words_per_page))
+        for page in range(page_count)
+    ]
+
+
+def _words(texts) -> list[str]:
+    return [word for text in texts for word in text.split()]
+
+
+def test_iter_chunks_across_windows():
+    """Chunks carried between windows neither lose nor duplicate text."""
+    pages = _numbered_pages(page_count=12, words_per_page=40)
+    chunks = list(iter_chunks(pages, chunk_size=120, overlap=0, window_size=500))
+
+    assert len(chunks) > 1, "Should produce several chunks"
+    assert _words(chunks) == _words(pages), "Each word should appear once, in order"
+    assert all(len(chunk) <= 120 for chunk in chunks), "Chunks should fit chunk_size"
+
+
+def test_iter_chunks_page_longer_than_window():
+    """A single page larger than the window is still chunked completely."""
+    pages = _numbered_pages(page_count=1, words_per_page=400)
+    assert len(pages[0]) > 500
+
+    chunks = list(iter_chunks(pages, chunk_size=120, overlap=0, window_size=500))
+
+    assert _words(chunks) == _words(pages), "Each word should appear once, in order"
+    assert all(len(chunk) <= 120 for chunk in chunks), "Chunks should fit chunk_size"
+
+
+def test_iter_chunks_trailing_whitespace_pages():
+    """Whitespace-only pages at the end add no empty chunks."""
+    pages = _numbered_pages(page_count=3, words_per_page=40) + ["   ", "\n\n", "\t"]
+    chunks = list(iter_chunks(pages, chunk_size=120, overlap=0, window_size=500))
+
+    assert _words(chunks) == _words(pages), "Each word should appear once, in order"
+    assert all(chunk.strip() for chunk in chunks), "All chunks should be non-empty"
+    blank = list(iter_chunks(["  ", "\n"], window_size=500))
+    assert not blank, "Blank input should yield no chunks"
@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.services.chunker import chunk_text
 from app.services.pdf_loader import extract_text_from_pdf
 from app.services.vectorstore import get_collection
+from app.tasks.rag_tasks import _clean_chunk
 
 
 @pytest.fixture
@@ -108,3 +109,40 @@ def test_chromadb_integration(pdf_path):
 
     assert len(ids) == len(test_batch), "Should add all test chunks to ChromaDB"
 
+
+def _baseline_clean(chunk):
+    """The per-character filter _clean_chunk replaced (None when nothing is left)."""
+    clean_chunk = chunk.encode("utf-8", errors="ignore")
+    clean_chunk = clean_chunk.decode("utf-8", errors="ignore")
+    clean_chunk = "".join(
+        char for char in clean_chunk if char.isprintable() or char in "\n\r\t "
+    )
+    return clean_chunk.strip() or None
+
+
+@pytest.mark.parametrize(
+    "chunk",
+    [
+        "plain ascii text",
+        "  padded\twith\r\nwhitespace  ",
+        "bell\x07 nul\x00 escape\x1b[0m delete\x7f",
+        "vertical\x0btab and form\x0cfeed",
+        "\x00\x01\x02\x1f",
+        "lone \ud800 high and \udfff low surrogates",
+        "\ud83d",
+        "non\u00a0breaking\u00a0space",
+        "caf\u00e9 \u2013 na\u00efve \u201cquotes\u201d",
+        "mixed ascii\x07 and \u00fcn\u00efcode\u200b zero width",
+        "emoji \U0001f600 and CJK \u6f22\u5b57",
+        "line\u2028separator and \u0085next line",
+        "C1 \x9f control and soft\u00adhyphen",
+        "combining e\u0301 and \ufeffBOM",
+        "",
+        "   ",
+        "\n\t\r",
+        "\u00a0\u200b",
+    ],
+)
+def test_clean_chunk_matches_baseline(chunk):
+    """The translate-based cleaner keeps exactly what the original filter kept."""
+    assert _clean_chunk(chunk) == _baseline_clean(chunk)
@@ -0,0 +1,76 @@
+"""Test the background prefetch used by PDF processing."""
+import itertools
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.tasks.rag_tasks import _prefetch
+
+
+class Abort(BaseException):
+    """A BaseException that is not an Exception, like KeyboardInterrupt."""
+
+
+def _prefetch_threads() -> list[threading.Thread]:
+    return [t for t in threading.enumerate() if t.name == "pdf-prefetch"]
+
+
+def _failing_items(error: BaseException):
+    yield 1
+    yield 2
+    raise error
+
+
+def test_prefetch_delivers_items_in_order():
+    """Every item arrives once, in the producer's order."""
+    assert list(_prefetch(range(100), maxsize=2)) == list(range(100))
+    assert list(_prefetch([])) == []
+    assert not _prefetch_threads(), "Producer should finish with the iterator"
+
+
+@pytest.mark.parametrize("error", [ValueError("bad page"), Abort()])
+def test_prefetch_reraises_producer_errors(error):
+    """Producer errors, BaseException included, are raised in the consumer."""
+    received = []
+    outcome = {}
+
+    def consume():
+        try:
+            for item in _prefetch(_failing_items(error)):
+                received.append(item)
+        except BaseException as e:
+            outcome["error"] = e
+
+    # Consume in a thread so a lost end marker fails the test instead of hanging it
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    consumer.join(timeout=5)
+
+    assert not consumer.is_alive(), "Consumer should not block after a producer error"
+    assert received == [1, 2]
+    assert outcome.get("error") is error
+    assert not _prefetch_threads(), "Producer should be joined"
+
+
+def test_prefetch_close_stops_producer():
+    """Closing a partly consumed iterator stops and joins the producer."""
+    produced = []
+
+    def endless():
+        for i in itertools.count():
+            produced.append(i)
+            yield i
+
+    batches = _prefetch(endless(), maxsize=2)
+    assert next(batches) == 0
+    assert next(batches) == 1
+
+    batches.close()
+
+    assert not _prefetch_threads(), "Producer should be stopped and joined"
+    assert len(produced) <= 2 + 2 + 1, "Producer should only run maxsize items ahead"
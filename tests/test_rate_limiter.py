@@ -0,0 +1,156 @@
+"""Test the Redis-backed rate limiter shared by notes workers."""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import redis
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import notes_llm
+
+NOW = 1_700_000_000.0
+
+
+class FakeClock:
+    """time.time()/monotonic()/sleep() where sleeping just advances the clock."""
+
+    def __init__(self):
+        self.now = NOW
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeRedis:
+    """Just enough of redis-py for the limiter; the script mirrors its Lua."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.windows = {}
+        self.expiry = {}
+        self.down = False
+
+    def register_script(self, script):
+        def acquire(keys, args):
+            self._check()
+            now, period, limit, member = float(args[0]), float(args[1]), int(args[2]), args[3]
+            window = self.windows.setdefault(keys[0], {})
+            for name, score in list(window.items()):
+                if score <= now - period:
+                    del window[name]
+            if len(window) < limit:
+                window[member] = now
+                return b"0"
+            return str(min(window.values()) + period - now).encode()
+
+        return acquire
+
+    def pttl(self, key):
+        self._check()
+        remaining = self.expiry.get(key, self.clock.now) - self.clock.now
+        return int(remaining * 1000) if remaining > 0 else -2
+
+    def set(self, key, value, px):
+        self._check()
+        self.expiry[key] = self.clock.now + px / 1000
+
+    def _check(self):
+        if self.down:
+            raise redis.ConnectionError("Redis is down")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(notes_llm, "time", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def fake_redis(monkeypatch, clock):
+    client = FakeRedis(clock)
+    monkeypatch.setattr(
+        notes_llm.redis, "Redis", SimpleNamespace(from_url=lambda url: client)
+    )
+    return client
+
+
+def test_acquire_under_limit_does_not_wait(fake_redis, clock):
+    """Calls within the limit go straight through and are recorded in Redis."""
+    limiter = notes_llm.RedisRateLimiter(max_calls=3, period=60)
+
+    for _ in range(3):
+        limiter.acquire()
+
+    assert clock.sleeps == []
+    assert len(fake_redis.windows[limiter.key]) == 3
+
+
+def test_acquire_over_limit_waits_for_window(fake_redis, clock):
+    """Over the limit, acquire sleeps until the oldest call leaves the window."""
+    limiter = notes_llm.RedisRateLimiter(max_calls=2, period=60)
+    limiter.acquire()
+    clock.now += 10
+    limiter.acquire()
+
+    limiter.acquire()
+
+    assert clock.sleeps == [50], "Wait until the first call is a period old"
+    assert clock.now == NOW + 60
+
+
+def test_limit_is_shared_between_limiters(fake_redis, clock):
+    """Two workers on the same key draw from one budget."""
+    first = notes_llm.RedisRateLimiter(max_calls=1, period=30)
+    second = notes_llm.RedisRateLimiter(max_calls=1, period=30)
+
+    first.acquire()
+    second.acquire()
+
+    assert clock.sleeps == [30]
+
+
+def test_acquire_recovers_after_window(fake_redis, clock):
+    """Once the period has passed, the full budget is available again."""
+    limiter = notes_llm.RedisRateLimiter(max_calls=2, period=60)
+    limiter.acquire()
+    limiter.acquire()
+
+    clock.now += 60
+    limiter.acquire()
+    limiter.acquire()
+
+    assert clock.sleeps == []
+
+
+def test_pause_holds_back_acquire(fake_redis, clock):
+    """A pause set after a 429 delays the next call even with budget left."""
+    limiter = notes_llm.RedisRateLimiter(max_calls=5, period=60)
+
+    limiter.pause(5)
+    limiter.pause(2)  # A shorter pause must not cut the longer one short
+    limiter.acquire()
+
+    assert clock.sleeps == [5]
+
+
+def test_falls_back_to_local_limit_when_redis_is_down(fake_redis, clock):
+    """Redis errors degrade to the in-process window instead of failing."""
+    limiter = notes_llm.RedisRateLimiter(max_calls=1, period=60)
+    fake_redis.down = True
+
+    limiter.acquire()
+    limiter.acquire()
+
+    assert clock.sleeps == [60]
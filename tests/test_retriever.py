@@ -0,0 +1,128 @@
+"""Test the retriever's search-result and query-embedding caches."""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import retriever, vectorstore
+
+NOW = 1_700_000_000.0
+
+
+class FakeCollection:
+    """Counts searches and returns a different chunk each time, so stale hits show."""
+
+    def __init__(self):
+        self.searches = 0
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k, filter=None):
+        self.searches += 1
+        doc = SimpleNamespace(
+            page_content=f"chunk from search {self.searches}",
+            metadata={"document_id": "doc-1"},
+        )
+        return [(doc, 0.9)]
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.queries = []
+
+    def embed_query(self, query):
+        self.queries.append(query)
+        return [0.1, 0.2, 0.3]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() as seen by the retriever."""
+    fake_clock = SimpleNamespace(now=NOW)
+    monkeypatch.setattr(retriever, "time", SimpleNamespace(time=lambda: fake_clock.now))
+    return fake_clock
+
+
+@pytest.fixture
+def collection(monkeypatch, clock):
+    """Empty caches and a fake collection and embedder behind the retriever."""
+    fake = FakeCollection()
+    monkeypatch.setattr(retriever, "get_collection", lambda name: fake)
+    monkeypatch.setattr(retriever, "get_embedder", FakeEmbedder)
+    retriever.clear_search_results()
+    retriever._embed_query_cached.cache_clear()
+    yield fake
+    retriever.clear_search_results()
+    retriever._embed_query_cached.cache_clear()
+
+
+def test_repeated_search_is_a_cache_hit(collection):
+    """An identical search is served from the cache, as a copy."""
+    first = retriever.semantic_search("what is x?", collection_name="docs")
+    first[0]["metadata"]["document_id"] = "mutated by caller"
+
+    second = retriever.semantic_search("what is x?", collection_name="docs")
+
+    assert collection.searches == 1
+    assert second[0]["content"] == "chunk from search 1"
+    assert second[0]["metadata"]["document_id"] == "doc-1"
+
+    retriever.semantic_search("what is x?", n_results=3, collection_name="docs")
+    assert collection.searches == 2, "Different parameters are a different entry"
+
+
+def test_cached_results_expire_after_ttl(collection, clock):
+    """Results are reused up to the TTL and searched again after it."""
+    retriever.semantic_search("q", collection_name="docs")
+
+    clock.now = NOW + retriever.RESULT_CACHE_TTL_SECONDS
+    retriever.semantic_search("q", collection_name="docs")
+    assert collection.searches == 1, "Still cached at the TTL"
+
+    clock.now = NOW + retriever.RESULT_CACHE_TTL_SECONDS + 1
+    results = retriever.semantic_search("q", collection_name="docs")
+    assert collection.searches == 2
+    assert results[0]["content"] == "chunk from search 2"
+
+
+def test_reset_collection_invalidates_results(collection, monkeypatch):
+    """After a collection reset the old results are never served."""
+    monkeypatch.setattr(vectorstore, "get_chroma_client", lambda: MagicMock())
+    retriever.semantic_search("q", collection_name="docs")
+
+    vectorstore.reset_collection("docs")
+    results = retriever.semantic_search("q", collection_name="docs")
+
+    assert collection.searches == 2
+    assert results[0]["content"] == "chunk from search 2"
+
+
+def test_clear_search_results_is_per_collection(collection):
+    """Clearing one collection's results leaves other collections cached."""
+    retriever.semantic_search("q", collection_name="docs")
+    retriever.semantic_search("q", collection_name="other_docs")
+
+    retriever.clear_search_results("docs")
+    retriever.semantic_search("q", collection_name="other_docs")
+    assert collection.searches == 2, "other_docs should still be cached"
+
+    retriever.semantic_search("q", collection_name="docs")
+    assert collection.searches == 3, "docs should be searched again"
+
+
+def test_query_embedding_is_memoized(collection, monkeypatch):
+    """Each distinct query is embedded once, even when results are not cached."""
+    embedder = FakeEmbedder()
+    monkeypatch.setattr(retriever, "get_embedder", lambda: embedder)
+
+    retriever.semantic_search("q", collection_name="docs")
+    retriever.clear_search_results()
+    retriever.semantic_search("q", collection_name="docs")
+    retriever.semantic_search("other q", collection_name="docs")
+
+    assert collection.searches == 3
+    assert embedder.queries == ["q", "other q"]
+    assert retriever.get_query_embedding("q") == [0.1, 0.2, 0.3]
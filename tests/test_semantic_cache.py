@@ -0,0 +1,142 @@
+"""Test semantic cache expiry, eviction and sweep logic."""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import semantic_cache
+
+NOW = 1_700_000_000.0
+
+
+class FakeCacheCollection:
+    """Stands in for the Chroma wrapper and its underlying collection."""
+
+    def __init__(self, timestamps=None, results=None):
+        self.timestamps = timestamps or {}
+        self.results = results or []
+        self.deleted = []
+        self._collection = self
+
+    def get(self, include):
+        return {
+            "ids": list(self.timestamps),
+            "metadatas": [{"ts": ts} for ts in self.timestamps.values()],
+        }
+
+    def delete(self, ids=None, where=None):
+        self.deleted.append(ids if ids is not None else where)
+
+    def similarity_search_with_relevance_scores(self, question, k, filter):
+        return self.results
+
+
+@pytest.fixture(autouse=True)
+def empty_negative_cache():
+    """Start and finish every test with no recorded misses."""
+    semantic_cache._negative_cache.clear()
+    yield
+    semantic_cache._negative_cache.clear()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() as seen by the cache module."""
+    fake_clock = SimpleNamespace(now=NOW)
+    fake_time = SimpleNamespace(time=lambda: fake_clock.now)
+    monkeypatch.setattr(semantic_cache, "time", fake_time)
+    return fake_clock
+
+
+def test_known_miss_expiry_boundary(clock):
+    """A miss is remembered for exactly NEGATIVE_TTL_SECONDS."""
+    semantic_cache.remember_miss("What is X?", "docs")
+
+    clock.now = NOW + semantic_cache.NEGATIVE_TTL_SECONDS
+    assert semantic_cache.is_known_miss("  what is x?  ", "docs"), "Kept at the TTL"
+    assert not semantic_cache.is_known_miss("What is X?", "other_docs")
+
+    clock.now = NOW + semantic_cache.NEGATIVE_TTL_SECONDS + 0.001
+    assert not semantic_cache.is_known_miss("What is X?", "docs"), "Expired after TTL"
+    assert not semantic_cache._negative_cache, "Expired miss should be dropped"
+
+
+def test_negative_cache_evicts_least_recently_used(clock):
+    """Above NEGATIVE_CACHE_SIZE the least recently used miss goes first."""
+    size = semantic_cache.NEGATIVE_CACHE_SIZE
+    for i in range(size):
+        semantic_cache.remember_miss(f"q{i}", "docs")
+
+    # Looking up q0 makes q1 the least recently used entry
+    assert semantic_cache.is_known_miss("q0", "docs")
+    semantic_cache.remember_miss("one more", "docs")
+
+    assert len(semantic_cache._negative_cache) == size
+    assert semantic_cache.is_known_miss("q0", "docs")
+    assert not semantic_cache.is_known_miss("q1", "docs"), "q1 should be evicted"
+    assert semantic_cache.is_known_miss("q2", "docs")
+    assert semantic_cache.is_known_miss("one more", "docs")
+
+
+def test_invalidate_collection(clock, monkeypatch):
+    """Invalidation forgets one collection's misses and deletes its answers."""
+    fake = FakeCacheCollection()
+    monkeypatch.setattr(semantic_cache, "get_cache_collection", lambda: fake)
+    semantic_cache.remember_miss("q", "docs")
+    semantic_cache.remember_miss("q", "other_docs")
+
+    semantic_cache.invalidate_collection("docs")
+
+    assert not semantic_cache.is_known_miss("q", "docs")
+    assert semantic_cache.is_known_miss("q", "other_docs")
+    assert fake.deleted == [{"collection_name": "docs"}]
+
+
+@pytest.mark.parametrize(
+    ("age", "similarity", "expected"),
+    [
+        (0, 0.99, "cached answer"),
+        (semantic_cache.TTL_SECONDS, 0.99, "cached answer"),
+        (semantic_cache.TTL_SECONDS + 1, 0.99, None),
+        (0, semantic_cache.SIMILARITY_THRESHOLD - 0.01, None),
+    ],
+)
+def test_lookup_answer_ttl_and_threshold(clock, monkeypatch, age, similarity, expected):
+    """Answers are reused only while fresh and similar enough."""
+    doc = SimpleNamespace(metadata={"answer": "cached answer", "ts": NOW - age})
+    fake = FakeCacheCollection(results=[(doc, similarity)])
+    monkeypatch.setattr(semantic_cache, "get_cache_collection", lambda: fake)
+
+    assert semantic_cache.lookup_answer("question", "docs") == expected
+
+
+def test_sweep_removes_expired_then_oldest_overflow(clock, monkeypatch):
+    """Expired entries go first, then the oldest live entries above the cap."""
+    ttl = 100
+    fake = FakeCacheCollection(timestamps={
+        "fresh-3": NOW - 10,
+        "expired-2": NOW - ttl - 5,
+        "fresh-1": NOW - 30,
+        "expired-1": NOW - ttl - 50,
+        "fresh-2": NOW - 20,
+        "fresh-4": NOW,
+    })
+    monkeypatch.setattr(semantic_cache, "get_cache_collection", lambda: fake)
+
+    removed = semantic_cache.sweep_cache(ttl_seconds=ttl, max_entries=2)
+
+    assert removed == 4
+    assert fake.deleted == [["expired-1", "expired-2", "fresh-1", "fresh-2"]]
+
+
+def test_sweep_without_stale_entries(clock, monkeypatch):
+    """Nothing is deleted while all entries are fresh and under the cap."""
+    fake = FakeCacheCollection(timestamps={"a": NOW - 1, "b": NOW})
+    monkeypatch.setattr(semantic_cache, "get_cache_collection", lambda: fake)
+
+    assert semantic_cache.sweep_cache(ttl_seconds=100, max_entries=2) == 0
+    assert fake.deleted == []
@@ -0,0 +1,162 @@
+"""Test user_service queries against a recording fake Supabase client."""
+import asyncio
+import string
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.auth import supabase_client
+from app.services import user_service
+
+
+class FakeQuery:
+    """Chainable PostgREST query builder that records every call."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return record
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows, count=len(self.rows))
+
+
+class FakeClient:
+    def __init__(self, rows=None):
+        self.query = FakeQuery(rows or [])
+        self.tables = []
+
+    def table(self, name):
+        self.tables.append(name)
+        return self.query
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """Route both the service and anon clients to one fake."""
+    client = FakeClient()
+    monkeypatch.setattr(supabase_client, "get_service_client", lambda: client)
+    monkeypatch.setattr(user_service, "get_supabase", lambda: client)
+    return client
+
+
+def _user(i):
+    return {"id": f"id-{i}", "created_at": "2025-01-01T00:00:00.123456+00:00"}
+
+
+def test_user_cursor_round_trip():
+    """Cursors survive a URL query string and decode to (created_at, id)."""
+    cursor = user_service._encode_user_cursor(_user(7))
+
+    assert set(cursor) <= set(string.ascii_letters + string.digits + "-_")
+    assert user_service._decode_user_cursor(cursor) == (
+        "2025-01-01T00:00:00.123456+00:00",
+        "id-7",
+    )
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm90IGpzb24", "WzFd"])
+def test_malformed_user_cursor(cursor):
+    with pytest.raises(ValueError):
+        user_service._decode_user_cursor(cursor)
+
+
+def test_get_all_users_pages_on_created_at_and_id(fake_client):
+    """Pages are ordered and filtered on (created_at, id), so ties are not skipped."""
+    fake_client.query.rows = [_user(3), _user(2)]
+    cursor = user_service._encode_user_cursor(_user(4))
+
+    users, next_cursor = asyncio.run(user_service.get_all_users(cursor=cursor, limit=2))
+
+    ts = "2025-01-01T00:00:00.123456+00:00"
+    assert users == [_user(3), _user(2)]
+    assert fake_client.query.calls == [
+        ("select", (user_service.USER_COLUMNS,), {}),
+        ("order", ("created_at",), {"desc": True}),
+        ("order", ("id",), {"desc": True}),
+        ("or_", (f'created_at.lt."{ts}",and(created_at.eq."{ts}",id.lt."id-4")',), {}),
+        ("limit", (2,), {}),
+    ]
+    assert user_service._decode_user_cursor(next_cursor) == (ts, "id-2")
+
+
+def test_get_all_users_last_page(fake_client):
+    """A short page has no next cursor, and the first page has no filter."""
+    fake_client.query.rows = [_user(1)]
+
+    users, next_cursor = asyncio.run(user_service.get_all_users(limit=2))
+
+    assert users == [_user(1)]
+    assert next_cursor is None
+    assert "or_" not in [name for name, _, _ in fake_client.query.calls]
+
+
+def test_user_id_filter_matches_id_or_auth_user_id():
+    assert user_service._user_id_filter("u-1") == "id.eq.u-1,auth_user_id.eq.u-1"
+
+
+def test_get_user_by_id_single_request(fake_client):
+    """One or_ query on id/auth_user_id; a row matching the primary key wins."""
+    fake_client.query.rows = [
+        {"id": "legacy-7", "auth_user_id": "u-1"},
+        {"id": "u-1", "auth_user_id": "u-1"},
+    ]
+
+    user = asyncio.run(user_service.get_user_by_id("u-1"))
+
+    assert user == {"id": "u-1", "auth_user_id": "u-1"}
+    assert fake_client.tables == ["users"]
+    assert fake_client.query.calls == [
+        ("select", (user_service.USER_COLUMNS,), {}),
+        ("or_", ("id.eq.u-1,auth_user_id.eq.u-1",), {}),
+    ]
+
+
+def test_get_user_by_id_migrated_user(fake_client):
+    """A migrated user found only through auth_user_id is still returned."""
+    fake_client.query.rows = [{"id": "legacy-7", "auth_user_id": "u-1"}]
+
+    assert asyncio.run(user_service.get_user_by_id("u-1")) == {
+        "id": "legacy-7",
+        "auth_user_id": "u-1",
+    }
+
+
+def test_get_user_by_id_not_found(fake_client):
+    assert asyncio.run(user_service.get_user_by_id("u-1")) is None
+
+
+def test_upsert_new_user_profile(fake_client):
+    """A new profile is written with one upsert on id, id doubling as auth_user_id."""
+    fake_client.query.rows = [{"id": "u-1", "email": "a@b.c"}]
+
+    profile = asyncio.run(user_service.upsert_new_user_profile(
+        "u-1", "a@b.c", {"username": "ab", "first_name": "A"}
+    ))
+
+    assert profile == {"id": "u-1", "email": "a@b.c"}
+    assert fake_client.tables == ["users"]
+    assert fake_client.query.calls == [
+        ("upsert", ({
+            "id": "u-1",
+            "auth_user_id": "u-1",
+            "email": "a@b.c",
+            "username": "ab",
+            "first_name": "A",
+            "last_name": None,
+            "profile_image_url": None,
+            "created_at": "now()",
+            "updated_at": "now()",
+        },), {"on_conflict": "id"}),
+    ]